@@ -21,12 +21,23 @@ class BaseHandler(ABC):
     PLATFORM_DISPLAY_NAME: ClassVar[str] = ''
     FULL_URL_PATTERNS: ClassVar[tuple[str, ...]] = ()
     SHORT_URL_PATTERNS: ClassVar[tuple[str, ...]] = ()
+    HOSTS: ClassVar[tuple[str, ...]] = ()  # Hosts the URL patterns match, used to dispatch shares to handlers
     CREATOR_URL_PATTERN: ClassVar[str] = ''
+    # Compiled from the URL patterns when a handler class is defined
+    _URL_REGEXES: ClassVar[tuple[re.Pattern[str], ...]] = ()
+    _SHARE_REGEX: ClassVar[Optional[re.Pattern[str]]] = None
     USE_COOKIES: ClassVar[bool] = False
     # Set during initialization
     PLATFORM: ClassVar[Optional[Platform]] = None
     DOWNLOAD_DIR: ClassVar[Optional[Path]] = None
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        patterns = cls.FULL_URL_PATTERNS + cls.SHORT_URL_PATTERNS
+        cls._URL_REGEXES = tuple(re.compile(pattern) for pattern in patterns)
+        # Any pattern matching is all that matters for support checks, so try them all in one pass
+        cls._SHARE_REGEX = re.compile('|'.join(f'(?:{pattern})' for pattern in patterns)) if patterns else None
+
     def __init__(self):
         cookies = None
         if self.USE_COOKIES:
@@ -61,13 +72,14 @@ class BaseHandler(ABC):
     @classmethod
     def supports_share(cls, share_text: str) -> bool:
         '''Check if the share text contains a supported URL.'''
-        return any(re.search(pattern, share_text) for pattern in cls.FULL_URL_PATTERNS + cls.SHORT_URL_PATTERNS)
+        return cls._SHARE_REGEX is not None and cls._SHARE_REGEX.search(share_text) is not None
     
     @classmethod
     def extract_url_from_share(cls, share_text: str) -> str | None:
         '''Extract the URL from the share text.'''
-        for pattern in cls.FULL_URL_PATTERNS + cls.SHORT_URL_PATTERNS:
-            if match := re.search(pattern, share_text):
+        # Patterns are tried in order so full URLs take priority over short ones
+        for regex in cls._URL_REGEXES:
+            if match := regex.search(share_text):
                 return match.group(0)
         return None
 
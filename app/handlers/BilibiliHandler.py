@@ -25,6 +25,7 @@ class BilibiliHandler(BaseHandler):
     SHORT_URL_PATTERNS = (
         r'https?://(?:www\.)?b23\.tv/[a-zA-Z0-9]+',  # Share URL
     )
+    HOSTS = ('bilibili.com', 'www.bilibili.com', 'b23.tv', 'www.b23.tv')
     CREATOR_URL_PATTERN = r'(?:https?:)?//space\.bilibili\.com/(\d+)'
 
     def __init__(self):
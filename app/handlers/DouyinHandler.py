@@ -22,6 +22,7 @@ class DouyinHandler(BaseHandler):
     SHORT_URL_PATTERNS = (
         r'https?://v\.douyin\.com/[a-zA-Z0-9_-]+/?',  # Share URL
     )
+    HOSTS = ('douyin.com', 'www.douyin.com', 'iesdouyin.com', 'www.iesdouyin.com', 'v.douyin.com')
     # CREATOR_URL_PATTERN = r'(?:https?:)?//space\.bilibili\.com/(\d+)'
     API_ROOT = f'http://localhost:{settings.DOUYIN_DOWNLOADER_PORT}'
 
@@ -28,6 +28,7 @@ class InsHandler(BaseHandler):
     SHORT_URL_PATTERNS = (
         r'https?://(?:www\.)?instagram\.com/share/[a-zA-Z0-9_-]+/?',
     )
+    HOSTS = ('instagram.com', 'www.instagram.com')
     USE_COOKIES = True
 
     def __init__(self):
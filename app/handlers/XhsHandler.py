@@ -27,6 +27,7 @@ class XhsHandler(BaseHandler):
     SHORT_URL_PATTERNS = (
         r'https?://xhslink\.com/[a-zA-Z]/[a-zA-Z0-9]+/?',  # Share URL
     )
+    HOSTS = ('xiaohongshu.com', 'www.xiaohongshu.com', 'xhslink.com')
     USE_COOKIES = True
     API_ROOT = f'http://localhost:{settings.XHS_DOWNLOADER_PORT}'
     XHS_PHOTO_ROOT = 'https://ci.xiaohongshu.com/'
@@ -1,3 +1,4 @@
+import re
 from typing import Type
 
 from sqlalchemy.orm import Session
@@ -17,6 +18,24 @@ HANDLERS: list[Type[BaseHandler]] = [
     InsHandler,
 ]
 
+_URL_HOST_REGEX = re.compile(r'https?://([^/\s?#]+)')
+_HANDLERS_BY_HOST: dict[str, Type[BaseHandler]] = {
+    host: handler_class for handler_class in HANDLERS for host in handler_class.HOSTS
+}
+
+
+def _find_handler_class(share_text: str) -> Type[BaseHandler] | None:
+    '''Find the handler class supporting the share text, looking it up by URL host before scanning all handlers.'''
+    for match in _URL_HOST_REGEX.finditer(share_text):
+        handler_class = _HANDLERS_BY_HOST.get(match.group(1).lower())
+        if handler_class is not None and handler_class.supports_share(share_text):
+            return handler_class
+    # Handlers that do not declare their hosts can only be found by trying their patterns
+    for handler_class in HANDLERS:
+        if not handler_class.HOSTS and handler_class.supports_share(share_text):
+            return handler_class
+    return None
+
 
 def get_handler_from_share(share_text: str) -> BaseHandler | None:
     '''
@@ -28,10 +47,8 @@ def get_handler_from_share(share_text: str) -> BaseHandler | None:
     Returns:
         The handler instance
     '''
-    for handler_class in HANDLERS:
-        if handler_class.supports_share(share_text):
-            return handler_class()
-    return None
+    handler_class = _find_handler_class(share_text)
+    return handler_class() if handler_class is not None else None
 
 
 def extract_url_from_share(share_text: str) -> str | None:
@@ -44,10 +61,8 @@ def extract_url_from_share(share_text: str) -> str | None:
     Returns:
         The extracted URL
     '''
-    for handler_class in HANDLERS:
-        if url := handler_class.extract_url_from_share(share_text):
-            return url
-    return None
+    handler_class = _find_handler_class(share_text)
+    return handler_class.extract_url_from_share(share_text) if handler_class is not None else None
 
 
 def initialize_platforms(db: Session) -> None:
@@ -1,21 +1,40 @@
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.db import SessionDep
 from app.models import Job
 from app.schemas import JobResponse
 from app.handlers import extract_url_from_share
-from app.utils.db import get_or_create_job_from_share
-from app.utils.queue import enqueue_job
+from app.utils.db import get_or_create_job_from_share, get_or_create_jobs_from_shares
+from app.utils.queue import enqueue_job, enqueue_jobs
 
 
 router = APIRouter()
 
+MAX_BULK_SHARES = 500
+MAX_BATCH_STATUS_IDS = 500
+
 
 class DownloadFromShareRequest(BaseModel):
     share: str
 
 
+class BulkDownloadFromShareRequest(BaseModel):
+    shares: list[str] = Field(max_length=MAX_BULK_SHARES)
+
+
+class BatchStatusRequest(BaseModel):
+    ids: list[int] = Field(max_length=MAX_BATCH_STATUS_IDS)
+
+
+class BulkDownloadResult(BaseModel):
+    share: str
+    job: Optional[JobResponse] = None
+    error: Optional[str] = None
+
+
 @router.post('/download', status_code=202)
 async def download_from_share(req: DownloadFromShareRequest, db: SessionDep) -> JobResponse:
     '''
@@ -34,6 +53,37 @@ async def download_from_share(req: DownloadFromShareRequest, db: SessionDep) ->
     return job
 
 
+@router.post('/download/bulk', status_code=202)
+async def bulk_download_from_shares(req: BulkDownloadFromShareRequest, db: SessionDep) -> list[BulkDownloadResult]:
+    '''
+    Create download jobs for many share texts and enqueue them together.
+    Returns one result per share, in order, holding either the job data or the reason it was rejected.
+    '''
+    urls = [extract_url_from_share(share) for share in req.shares]
+    valid_shares = [(share, url) for share, url in zip(req.shares, urls) if url is not None]
+    jobs = iter(get_or_create_jobs_from_shares(db=db, shares=valid_shares))
+    
+    results = []
+    queued = {}
+    for share, url in zip(req.shares, urls):
+        if url is None:
+            results.append(BulkDownloadResult(share=share, error='No supported URL found in the share text.'))
+            continue
+        job = next(jobs)
+        queued[job.id] = job
+        results.append(BulkDownloadResult(share=share, job=JobResponse.model_validate(job)))
+    # Shares resolving to the same job are only enqueued once
+    enqueue_jobs(list(queued.values()))
+
+    return results
+
+
+@router.post('/download/batch-status')
+async def get_download_statuses(req: BatchStatusRequest, db: SessionDep) -> list[JobResponse]:
+    '''Get the status of many download jobs at once. IDs of jobs that do not exist are left out.'''
+    return db.query(Job).filter(Job.id.in_(req.ids)).all()
+
+
 @router.get('/download/{job_id}')
 async def get_download_status(job_id: int, db: SessionDep) -> JobResponse:
     '''Get the status of a download job.'''
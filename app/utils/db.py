@@ -69,6 +69,37 @@ def get_or_create_job_from_share(db: Session, share_text: str, share_url: str) -
     return job
 
 
+def get_or_create_jobs_from_shares(db: Session, shares: list[tuple[str, str]]) -> list[Job]:
+    '''
+    Get or create Job records for many shares at once, committing all new jobs together.
+    
+    Args:
+        db: Database session
+        shares: List of (share_text, share_url) tuples
+        
+    Returns:
+        List of Job instances, one per share in the same order
+    '''
+    share_urls = {share_url for _, share_url in shares}
+    existing = db.query(Job).filter(
+        Job.share_url.in_(share_urls),
+        Job.status.in_([JobStatus.pending, JobStatus.processing, JobStatus.completed])
+    ).all()
+    jobs_by_url = {job.share_url: job for job in existing}
+    
+    new_jobs = []
+    for share_text, share_url in shares:
+        if share_url not in jobs_by_url:
+            job = Job(share_text=share_text, share_url=share_url, status=JobStatus.pending)
+            jobs_by_url[share_url] = job
+            new_jobs.append(job)
+    if new_jobs:
+        db.add_all(new_jobs)
+        db.commit()
+    
+    return [jobs_by_url[share_url] for _, share_url in shares]
+
+
 def get_or_create_creator(db: Session, platform: Platform, post_info: PostInfo, download_profile_pic: bool = True, commit: bool = True) -> Creator:
     '''
     Get or create a Creator record. Currently uses PostInfo object for consistency purposes.
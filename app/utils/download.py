@@ -1,9 +1,13 @@
+import os
 import time
+import asyncio
 import hashlib
+import random
 import re
+import threading
 import uuid
 from pathlib import Path
-from typing import Any, Optional, Literal
+from typing import Any, AsyncIterator, Iterator, Optional, Literal
 from http.cookiejar import MozillaCookieJar
 from urllib.parse import urlparse, unquote
 from mimetypes import guess_extension
@@ -11,6 +15,7 @@ from mimetypes import guess_extension
 import httpx
 import magic
 from yt_dlp import YoutubeDL
+from yt_dlp.cookies import YDLLogger, extract_cookies_from_browser
 from gallery_dl import config as gdl_config
 from gallery_dl.job import DownloadJob
 
@@ -19,12 +24,36 @@ from app.models.enums import UserAgent
 from app.utils.helpers import sanitize_filename
 
 
-# Module-level cache for cookie file path and last extraction time
+# Module-level cache for cookie file path, last extraction time, and the parsed cookie jar
+# The jar is keyed by the cookie file's (mtime, size) so it is reparsed only when the file changes
 _cookie_cache_info: dict[str, Any] = {
     'cookie_file': None,
     'last_extracted': None,
+    'jar': None,
+    'mtime': None,
+    'size': None,
 }
 
+# Browser cookies exported in Netscape format, shared with gallery-dl and yt-dlp
+_COOKIE_FILE = settings.CACHE_DIR / 'cookies.txt'
+
+# Downloaded chunks are written with one writev per batch, bounded in bytes and well below IOV_MAX in count
+_WRITE_BATCH_BYTES = 4 * 1024 * 1024
+_WRITE_BATCH_CHUNKS = 64
+
+# Upper bound in seconds on the backoff between download attempts
+_MAX_RETRY_DELAY = 30.0
+
+# Per-thread libmagic instances, see _get_magic
+_magic_local = threading.local()
+
+# HTTP/2 multiplexes concurrent streams over one connection per host, so allow plenty of them
+_DOWNLOAD_LIMITS = httpx.Limits(
+    max_connections=1000,
+    max_keepalive_connections=100,
+    keepalive_expiry=45.0,
+)
+
 
 def _extract_and_save_cookies(cookie_file: Path) -> bool:
     '''
@@ -37,47 +66,26 @@ def _extract_and_save_cookies(cookie_file: Path) -> bool:
         True if cookies were successfully extracted and saved, False otherwise.
     '''
     try:
-        # Use yt-dlp with cookiesfrombrowser to extract cookies
-        # We need to make a request to trigger cookie extraction
-        extract_options = {
-            'cookiesfrombrowser': ('edge',),
-            'quiet': True,
-            'no_warnings': True,
-            'skip_download': True,
-        }
+        # Read Edge's cookie store directly rather than spinning up a whole YoutubeDL instance for it.
+        # A logger without a YoutubeDL instance discards every message, like the quiet instance used to.
+        cookie_jar = extract_cookies_from_browser('edge', logger=YDLLogger())
+        if not cookie_jar:
+            return False
         
-        # Make a request to bilibili.com to populate the cookie jar
-        # This will trigger cookie extraction from the browser
-        with YoutubeDL(extract_options) as ydl:
-            # try:
-            #     # Try to extract info from bilibili.com to populate cookies
-            #     # We don't need a specific video, just need to trigger cookie extraction
-            #     ydl.extract_info('https://www.bilibili.com/', download=False)
-            # except Exception:
-            #     # Even if extraction fails, cookies might still be populated
-            #     # yt-dlp extracts cookies before making the request
-            #     pass
-            
-            # Save cookies to file in Netscape format
-            # yt-dlp uses http.cookiejar.MozillaCookieJar or similar
-            if hasattr(ydl, 'cookiejar') and ydl.cookiejar:
-                cookie_file.parent.mkdir(parents=True, exist_ok=True)
-                # Save cookies in Netscape format
-                if isinstance(ydl.cookiejar, MozillaCookieJar):
-                    ydl.cookiejar.save(str(cookie_file), ignore_discard=True, ignore_expires=True)
-                else:
-                    # If it's a different type, convert to MozillaCookieJar
-                    mozilla_jar = MozillaCookieJar(str(cookie_file))
-                    for cookie in ydl.cookiejar:
-                        mozilla_jar.set_cookie(cookie)
-                    mozilla_jar.save(ignore_discard=True, ignore_expires=True)
-                return True
+        # Save cookies in Netscape format
+        cookie_file.parent.mkdir(parents=True, exist_ok=True)
+        cookie_jar.save(str(cookie_file), ignore_discard=True, ignore_expires=True)
+        
+        # Keep the extracted jar in memory so _load_cookie_jar does not parse the file straight back in
+        stat = cookie_file.stat()
+        _cookie_cache_info['jar'] = cookie_jar
+        _cookie_cache_info['mtime'] = stat.st_mtime_ns
+        _cookie_cache_info['size'] = stat.st_size
+        return True
     
     except Exception:
         # If extraction fails, return False
         return False
-    
-    return False
 
 
 def _get_cookie_file() -> Optional[Path]:
@@ -87,7 +95,7 @@ def _get_cookie_file() -> Optional[Path]:
     Returns:
         Path to the cookie file if available, None otherwise.
     '''
-    cookie_file = settings.CACHE_DIR / 'cookies.txt'
+    cookie_file = _COOKIE_FILE
     current_time = time.time()
     
     # Check if we need to refresh cookies
@@ -128,6 +136,32 @@ def _get_cookie_file() -> Optional[Path]:
     return None
 
 
+def _load_cookie_jar(cookie_file: Path) -> MozillaCookieJar:
+    '''
+    Load the cookie jar from the cookie file, reusing the cached jar while the file is unchanged.
+    
+    Args:
+        cookie_file: Path to the Netscape-format cookie file.
+        
+    Returns:
+        The parsed cookie jar.
+    '''
+    stat = cookie_file.stat()
+    if (
+        _cookie_cache_info['jar'] is not None
+        and _cookie_cache_info['mtime'] == stat.st_mtime_ns
+        and _cookie_cache_info['size'] == stat.st_size
+    ):
+        return _cookie_cache_info['jar']
+    
+    cookie_jar = MozillaCookieJar()
+    cookie_jar.load(str(cookie_file), ignore_discard=True, ignore_expires=True)
+    _cookie_cache_info['jar'] = cookie_jar
+    _cookie_cache_info['mtime'] = stat.st_mtime_ns
+    _cookie_cache_info['size'] = stat.st_size
+    return cookie_jar
+
+
 def get_all_cookies() -> httpx.Cookies | None:
     '''
     Get all cookies from the cookie file and return them in httpx.Cookies format.
@@ -136,8 +170,7 @@ def get_all_cookies() -> httpx.Cookies | None:
     if not (cookie_file and cookie_file.exists()):
         return None
     
-    cookie_jar = MozillaCookieJar()
-    cookie_jar.load(str(cookie_file), ignore_discard=True, ignore_expires=True)
+    cookie_jar = _load_cookie_jar(cookie_file)
     cookies = httpx.Cookies()
     for cookie in cookie_jar:
         cookies.set(cookie.name, cookie.value or '', domain=cookie.domain, path=cookie.path)
@@ -165,10 +198,21 @@ def _get_valid_extensions(format: str) -> list[str]:
     }.get(format, [])
 
 
+def _get_magic() -> magic.Magic:
+    '''
+    Get this thread's libmagic instance.
+    magic.from_file serialises every call on one shared instance, so each thread gets its own to detect in parallel.
+    '''
+    instance = getattr(_magic_local, 'instance', None)
+    if instance is None:
+        instance = _magic_local.instance = magic.Magic()
+    return instance
+
+
 def _detect_file_format(file_path: Path) -> str | None:
     '''Detect actual file format using libmagic.'''
     try:
-        description = magic.from_file(str(file_path)).lower()
+        description = _get_magic().from_file(str(file_path)).lower()
     except Exception:
         return None
 
@@ -252,6 +296,9 @@ def download_yt_dlp(
         'outtmpl': '[%(id)s] %(title)s.%(ext)s',
         'format': 'bestvideo+bestaudio/best',
         'cookiefile': str(cookie_file),
+        'concurrent_fragment_downloads': 4,  # Fetch fragments of segmented (DASH/HLS) formats in parallel
+        'http_chunk_size': 10 << 20,  # Request progressive downloads in 10 MiB ranges to avoid server throttling
+        'extractor_retries': 3,
     }
     ydl_options.update(extra_options)
 
@@ -339,6 +386,36 @@ def download_gallery_dl(
     return job.out.paths
 
 
+# Preferred extensions for common media Content-Types; anything else falls back to mimetypes
+_CONTENT_TYPE_EXTENSIONS: dict[str, str] = {
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/png': '.png',
+    'image/heic': '.heic',
+    'image/heif': '.heif',
+    'image/heic-sequence': '.heic',
+    'image/heif-sequence': '.heif',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'video/mp4': '.mp4',
+    'video/webm': '.webm',
+    'video/hevc': '.hevc',
+    'video/quicktime': '.mov',
+    'video/x-msvideo': '.avi',
+    'video/x-matroska': '.mkv',
+    'video/x-m4v': '.m4v',
+    'video/3gpp': '.3gp',
+    'video/x-flv': '.flv',
+    'video/x-ms-wmv': '.wmv',
+}
+
+# Format: attachment; filename="file.jpg" or attachment; filename*=UTF-8''file.jpg
+_CONTENT_DISPOSITION_FILENAME_PATTERN = re.compile(
+    r'filename[*]?=(?:UTF-8\'\')?["\']?([^"\';]+)["\']?',
+    re.IGNORECASE,
+)
+
+
 def _determine_file_extension(response: httpx.Response, fallback: Optional[str] = None) -> str:
     '''
     Determine the file extension from the an HTTP response.
@@ -352,27 +429,9 @@ def _determine_file_extension(response: httpx.Response, fallback: Optional[str]
     '''
     # Try to infer from Content-Type header
     content_type = response.headers.get('Content-Type', '')
-    extension = {
-        'image/jpeg': '.jpg',
-        'image/jpg': '.jpg',
-        'image/png': '.png',
-        'image/heic': '.heic',
-        'image/heif': '.heif',
-        'image/heic-sequence': '.heic',
-        'image/heif-sequence': '.heif',
-        'image/gif': '.gif',
-        'image/webp': '.webp',
-        'video/mp4': '.mp4',
-        'video/webm': '.webm',
-        'video/hevc': '.hevc',
-        'video/quicktime': '.mov',
-        'video/x-msvideo': '.avi',
-        'video/x-matroska': '.mkv',
-        'video/x-m4v': '.m4v',
-        'video/3gpp': '.3gp',
-        'video/x-flv': '.flv',
-        'video/x-ms-wmv': '.wmv',
-    }.get(content_type, guess_extension(content_type))
+    # Ignore parameters such as '; charset=...'
+    mime_type = content_type.split(';', 1)[0].strip().lower()
+    extension = _CONTENT_TYPE_EXTENSIONS.get(mime_type) or guess_extension(mime_type)
     if extension:
         return extension
     
@@ -409,12 +468,7 @@ def _determine_filename(response: httpx.Response) -> str:
     content_disposition = response.headers.get('Content-Disposition', '')
     filename = None
     if content_disposition:
-        # Format: attachment; filename="file.jpg" or attachment; filename*=UTF-8''file.jpg
-        filename_match = re.search(
-            r'filename[*]?=(?:UTF-8\'\')?["\']?([^"\';]+)["\']?',
-            content_disposition,
-            re.IGNORECASE
-        )
+        filename_match = _CONTENT_DISPOSITION_FILENAME_PATTERN.search(content_disposition)
         if filename_match:
             filename = unquote(filename_match.group(1))
     
@@ -430,13 +484,171 @@ def _determine_filename(response: httpx.Response) -> str:
     return filename
 
 
+def _build_request_headers(headers: Optional[dict[str, str]] = None) -> dict[str, str]:
+    '''Build the default request headers for direct file downloads, merged with any custom headers.'''
+    request_headers = {
+        'User-Agent': UserAgent.MAC_EDGE,
+        'Accept': '*/*',
+        'Accept-Encoding': 'gzip, deflate',  # Universal support; XHS CDN rejects identity/br/zstd
+        'Connection': 'keep-alive',
+    }
+    if headers:
+        request_headers.update(headers)
+    return request_headers
+
+
+def _build_timeout(timeout: float) -> httpx.Timeout:
+    '''Build the httpx timeout for direct file downloads, where `timeout` is the read timeout.'''
+    # Default timeout is 60s, but for large files we should use at least 600s (10 minutes)
+    return httpx.Timeout(
+        connect=10.0,
+        read=timeout,
+        write=15.0,
+        pool=10.0,
+    )
+
+
+def _part_path(file_path: Path) -> Path:
+    '''The temporary path a download is written to before being renamed into place.'''
+    return file_path.with_name(file_path.name + '.part')
+
+
+def _resolve_file_path(file_path: Path, overwrite: bool) -> Path:
+    '''
+    Resolve the path a download should be saved to, and claim its `.part` file by creating it.
+
+    Args:
+        file_path: The desired path of the downloaded file.
+        overwrite: Whether to replace an existing file instead of picking a unique name.
+
+    Returns:
+        Path: The final path, which does not currently exist unless overwriting.
+    '''
+    stem = file_path.stem
+    suffix = file_path.suffix
+    while True:
+        if overwrite or not file_path.exists():
+            # Creating the .part file exclusively stops concurrent downloads from claiming the same name
+            # When overwriting, the final rename replaces the existing file
+            flags = os.O_WRONLY | os.O_CREAT | (0 if overwrite else os.O_EXCL)
+            try:
+                os.close(os.open(_part_path(file_path), flags, 0o644))
+                return file_path
+            except FileExistsError:
+                pass
+        # Find a unique filename by appending a short UUID
+        unique_id = uuid.uuid4().hex[:8]
+        file_path = file_path.parent / f'{stem}_{unique_id}{suffix}'
+
+
+def _open_download_file(file_path: Path, append: bool) -> int:
+    '''Open a download target as a raw file descriptor, so chunks go straight to the kernel without a userspace buffer.'''
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if append else os.O_TRUNC)
+    return os.open(file_path, flags, 0o644)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    '''Write all of `data` to a raw file descriptor, retrying on short writes.'''
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _is_identity_encoded(response: httpx.Response) -> bool:
+    '''Whether the response body is sent as-is, so it can be streamed raw without decoding.'''
+    return response.headers.get('Content-Encoding', 'identity').strip().lower() == 'identity'
+
+
+def _writev_all(fd: int, chunks: list[bytes]) -> None:
+    '''Write a batch of chunks with one gather write, finishing any short write chunk by chunk.'''
+    written = os.writev(fd, chunks)
+    for chunk in chunks:
+        if written >= len(chunk):
+            written -= len(chunk)
+            continue
+        _write_all(fd, memoryview(chunk)[written:])
+        written = 0
+
+
+def _batch_chunks(chunks: Iterator[bytes]) -> Iterator[list[bytes]]:
+    '''Group small chunks so each batch can go to the kernel in a single writev.'''
+    batch: list[bytes] = []
+    batch_size = 0
+    try:
+        for chunk in chunks:
+            batch.append(chunk)
+            batch_size += len(chunk)
+            if batch_size >= _WRITE_BATCH_BYTES or len(batch) >= _WRITE_BATCH_CHUNKS:
+                yield batch
+                batch = []
+                batch_size = 0
+    except Exception:
+        # Hand over what already arrived before failing, so a retry can resume from it with a Range request
+        if batch:
+            yield batch
+        raise
+    if batch:
+        yield batch
+
+
+async def _abatch_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[list[bytes]]:
+    '''Async counterpart of `_batch_chunks`.'''
+    batch: list[bytes] = []
+    batch_size = 0
+    try:
+        async for chunk in chunks:
+            batch.append(chunk)
+            batch_size += len(chunk)
+            if batch_size >= _WRITE_BATCH_BYTES or len(batch) >= _WRITE_BATCH_CHUNKS:
+                yield batch
+                batch = []
+                batch_size = 0
+    except Exception:
+        if batch:
+            yield batch
+        raise
+    if batch:
+        yield batch
+
+
+def _iter_body(response: httpx.Response, chunk_size: int) -> Iterator[bytes]:
+    '''Iterate a response body, skipping the decoder pass when there is nothing to decode.'''
+    if _is_identity_encoded(response):
+        return response.iter_raw(chunk_size=chunk_size)
+    return response.iter_bytes(chunk_size=chunk_size)
+
+
+def _aiter_body(response: httpx.Response, chunk_size: int) -> AsyncIterator[bytes]:
+    '''Async counterpart of `_iter_body`.'''
+    if _is_identity_encoded(response):
+        return response.aiter_raw(chunk_size=chunk_size)
+    return response.aiter_bytes(chunk_size=chunk_size)
+
+
+def _write_response(response: httpx.Response, file_path: Path, append: bool, chunk_size: int) -> None:
+    '''Stream a response body to a file, appending to it when resuming.'''
+    fd = _open_download_file(file_path, append)
+    try:
+        for batch in _batch_chunks(_iter_body(response, chunk_size)):
+            _writev_all(fd, batch)
+    finally:
+        os.close(fd)
+
+
+def _sleep_before_retry(attempt: int, max_attempts: int) -> None:
+    '''Back off exponentially with jitter and a cap, and not at all after the final attempt.'''
+    if attempt < max_attempts - 1:
+        time.sleep(min(_MAX_RETRY_DELAY, 2 ** attempt + random.uniform(0, 1)))
+
+
 def download_file(
     url: str,
     download_dir: Path = settings.MEDIA_ROOT_DIR,
     filename: Optional[str] = None,
     extension_fallback: Optional[str] = None,
     use_cookies: bool = False,
-    chunk_size: int = 1024 * 1024,
+    chunk_size: int = 4 * 1024 * 1024,
     timeout: float = 60.0,
     headers: Optional[dict[str, str]] = None,
     overwrite: bool = False,
@@ -452,7 +664,7 @@ def download_file(
                   extracted from URL or Content-Disposition header.
         extension_fallback: Optional extension to use if the extension cannot be determined from the Content-Type header.
         use_cookies: Whether to use cookies from the cookie file. Defaults to False.
-        chunk_size: Size of chunks to read in bytes. Defaults to 1MB.
+        chunk_size: Size of chunks to read in bytes. Defaults to 4MB.
         timeout: Request timeout in seconds. Defaults to 60.0. For large files, consider using a larger value (e.g., 600.0).
         headers: Optional custom headers to include in the request.
         overwrite: Whether to overwrite existing files. Defaults to False.
@@ -467,146 +679,80 @@ def download_file(
         ValueError: If filename cannot be determined.
     '''
     # Prepare request headers and cookies
-    request_headers = {
-        'User-Agent': UserAgent.MAC_EDGE,
-        'Accept': '*/*',
-        'Accept-Encoding': 'gzip, deflate',  # Universal support; XHS CDN rejects identity/br/zstd
-        'Connection': 'keep-alive',
-    }
-    if headers:
-        request_headers.update(headers)
+    request_headers = _build_request_headers(headers)
     cookies = None
     if use_cookies:
         cookies = get_all_cookies()
     
-    # Default timeout is 60s, but for large files we should use at least 600s (10 minutes)
-    httpx_timeout = httpx.Timeout(
-        connect=10.0,
-        read=timeout,
-        write=15.0,
-        pool=10.0,
-    )
-    # Set limits for download stability
-    limits = httpx.Limits(
-        max_connections=10,
-        max_keepalive_connections=5,
-        keepalive_expiry=45.0,
-    )
-    
-    extension = None
-    file_path = None
-    file_exists = False
-    resume_supported = False
     expected_size = None
     
-    with httpx.Client(cookies=cookies, timeout=httpx_timeout, limits=limits, follow_redirects=True) as client:
-        try:
-            # Make a HEAD request to check for resume support
-            test_response = client.head(url, headers=request_headers, follow_redirects=True)
-            test_response.raise_for_status()
-            if test_response.headers.get('Accept-Ranges') == 'bytes':
-                # Server supports Range requests
-                resume_supported = True
-                if not filename:
-                    filename = _determine_filename(test_response)
-                extension = _determine_file_extension(test_response, extension_fallback)
-                expected_size = test_response.headers.get('Content-Length')  # TODO: Check this when download is finished
-        except (httpx.HTTPStatusError, httpx.RequestError) as e:
-            # HEAD not supported or failed, we'll determine from GET response with Range header
-            try:
-                test_response = client.get(url, headers={'Range': 'bytes=0-0', **request_headers}, follow_redirects=True)
-                if test_response.status_code == 206:  # Partial Content
-                    resume_supported = True
-                    if not filename and test_response.headers.get('Content-Disposition'):
-                        filename = _determine_filename(test_response)
-                    if test_response.headers.get('Content-Type'):
-                        extension = _determine_file_extension(test_response, extension_fallback)
-                    if content_range := test_response.headers.get('Content-Range'):
-                        expected_size = int(content_range.split('/')[-1])
-            except Exception as e:
-                pass
-        
-        # Determine filename and extension by making a GET request
-        if not filename or not extension or not expected_size:
+    with httpx.Client(
+        cookies=cookies,
+        timeout=_build_timeout(timeout),
+        limits=_DOWNLOAD_LIMITS,
+        http2=True,
+        follow_redirects=True,
+    ) as client:
+        # A single ranged GET tells us the filename, extension, size, and whether the server can resume
+        # Servers without Range support answer 200 with the whole file, which we then save directly
+        with client.stream('GET', url, headers={**request_headers, 'Range': 'bytes=0-0'}) as probe:
             try:
-                with client.stream('GET', url, headers=request_headers) as response:
-                    response.raise_for_status()
-                    if filename is None:
-                        filename = _determine_filename(response)
-                    if extension is None:
-                        extension = _determine_file_extension(response, extension_fallback)
-                    if expected_size is None:
-                        expected_size = response.headers.get('Content-Length')
-            except Exception as e:
+                probe.raise_for_status()
+            except httpx.HTTPStatusError as e:
                 print(f'Failed to GET url: {url}: {e}')
-                print(f'Current info: {filename}, {extension}, {expected_size}')
                 raise
+            resume_supported = probe.status_code == 206  # Partial Content
+            if not filename:
+                filename = _determine_filename(probe)
+            extension = _determine_file_extension(probe, extension_fallback)
+            if resume_supported and (content_range := probe.headers.get('Content-Range')):
+                expected_size = content_range.split('/')[-1]  # TODO: Check this when download is finished
+            
+            # Determine final file name and path
+            final_filename = sanitize_filename(filename + extension)
+            if not final_filename:
+                raise ValueError(f'Could not determine filename for URL: {url}')
+            file_path = _resolve_file_path(download_dir / final_filename, overwrite)
+            part_path = _part_path(file_path)
+            
+            if not resume_supported:
+                # Without resume support there is only one attempt, and this response already carries the file
+                try:
+                    _write_response(probe, part_path, append=False, chunk_size=chunk_size)
+                except BaseException:
+                    part_path.unlink(missing_ok=True)
+                    raise
+                os.rename(part_path, file_path)
+                return _fix_file_extension(file_path)
         
-        # Determine final file name and path
-        final_filename = sanitize_filename(filename + extension)
-        if not final_filename:
-            raise ValueError(f'Could not determine filename for URL: {url}')
-        file_path = download_dir / final_filename
-        file_exists = file_path.exists()
-        
-        # Handle existing files
-        if file_exists:
-            # Note this could be from a previous worker attempt to download the same file
-            # Do we want to delete it?
-            if overwrite:
-                # Overwrite mode: delete existing file
-                file_path.unlink()
-                file_exists = False
-            else:
-                # Find a unique filename by appending a short UUID
-                stem = file_path.stem
-                suffix = file_path.suffix
-                while file_path.exists():
-                    unique_id = uuid.uuid4().hex[:8]
-                    file_path = download_dir / f'{stem}_{unique_id}{suffix}'
-                file_exists = False
-        
-        max_attempts = retries if resume_supported else 1
-        
+        max_attempts = retries
         last_exception = None
+        # Track progress in-process so resuming needs no stat of the partial file
+        bytes_written = 0
         for attempt in range(max_attempts):
             try:
                 # Check if we should resume
-                resume_from = 0
-                if resume_supported and file_path.exists() and not overwrite:
-                    file_size = file_path.stat().st_size
-                    if file_size > 0:
-                        resume_from = file_size
-                        request_headers['Range'] = f'bytes={resume_from}-'
+                if bytes_written > 0:
+                    request_headers['Range'] = f'bytes={bytes_written}-'
                 
                 with client.stream('GET', url, headers=request_headers) as response:
                     response.raise_for_status()
                     
-                    file_mode = 'wb'  # Write mode
-                    if resume_from > 0:
-                        # Resuming from previous download
-                        if response.status_code == 206:  # Partial Content
-                            # Server supports range requests, resume successful
-                            file_mode = 'ab'  # Append mode
-                        elif response.status_code == 200:
-                            # Server doesn't support range requests, restart download
-                            file_mode = 'wb'  # Write mode
-                            # Make a new request without the Range header
-                            response.close()
-                            request_headers.pop('Range', None)
-                            with client.stream('GET', url, headers=request_headers) as response:
-                                response.raise_for_status()
-                                for chunk in response.iter_bytes(chunk_size=chunk_size):
-                                    f.write(chunk)
-                            file_path = _fix_file_extension(file_path)
-                            return file_path
-                        else:
-                            response.raise_for_status()
-                    
-                    with file_path.open(file_mode) as f:
-                        for chunk in response.iter_bytes(chunk_size=chunk_size):
-                            f.write(chunk)
-
+                    # Append only if the server honoured the Range header (206 Partial Content)
+                    # A 200 means it sent the whole file again, so start over
+                    append = bytes_written > 0 and response.status_code == 206
+                    if not append:
+                        bytes_written = 0
+                    fd = _open_download_file(part_path, append)
+                    try:
+                        for batch in _batch_chunks(_iter_body(response, chunk_size)):
+                            _writev_all(fd, batch)
+                            bytes_written += sum(map(len, batch))
+                    finally:
+                        os.close(fd)
+
+                    # Only complete downloads ever appear under the final name
+                    os.rename(part_path, file_path)
                     file_path = _fix_file_extension(file_path)
                     return file_path
             
@@ -631,53 +777,138 @@ def download_file(
                 #             pass
                 #     raise
 
-                # Remove Range header for next attempt (will be re-added if file still exists)
+                # Remove Range header for next attempt (will be re-added if anything was written)
                 request_headers.pop('Range', None)
-                time.sleep(2 * 2 ** attempt)
+                _sleep_before_retry(attempt, max_attempts)
                 continue
             except Exception as e:
                 last_exception = e
                 request_headers.pop('Range', None)
-                time.sleep(2 * 2 ** attempt)
+                _sleep_before_retry(attempt, max_attempts)
                 continue
         
         # If we get here, all retries failed
-        if file_path and file_path.exists() and not file_exists:
-            try:
-                file_path.unlink()
-            except Exception:
-                pass
+        part_path.unlink(missing_ok=True)
         if last_exception:
             raise last_exception
         raise httpx.HTTPError(f'Failed to download {url} after {max_attempts} attempts')
 
 
+async def _async_download_one(
+    client: httpx.AsyncClient,
+    url: str,
+    download_dir: Path,
+    filename: Optional[str],
+    extension_fallback: Optional[str],
+    chunk_size: int,
+    headers: dict[str, str],
+    overwrite: bool,
+) -> Path:
+    '''
+    Download a single file with an existing async client.
+    Unlike download_file, this makes a single streaming request and does not resume.
+    '''
+    async with client.stream('GET', url, headers=headers) as response:
+        response.raise_for_status()
+        if not filename:
+            filename = _determine_filename(response)
+        extension = _determine_file_extension(response, extension_fallback)
+        final_filename = sanitize_filename(filename + extension)
+        if not final_filename:
+            raise ValueError(f'Could not determine filename for URL: {url}')
+        file_path = _resolve_file_path(download_dir / final_filename, overwrite)
+        part_path = _part_path(file_path)
+        fd = _open_download_file(part_path, append=False)
+        try:
+            async for batch in _abatch_chunks(_aiter_body(response, chunk_size)):
+                await asyncio.to_thread(_writev_all, fd, batch)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        finally:
+            os.close(fd)
+    os.rename(part_path, file_path)
+    return await asyncio.to_thread(_fix_file_extension, file_path)
+
+
+async def download_files(
+    urls: list[str],
+    download_dir: Path = settings.MEDIA_ROOT_DIR,
+    filenames: Optional[list[Optional[str]]] = None,
+    extension_fallback: Optional[str] = None,
+    use_cookies: bool = False,
+    concurrency: int = 16,
+    chunk_size: int = 4 * 1024 * 1024,
+    timeout: float = 60.0,
+    headers: Optional[dict[str, str]] = None,
+    overwrite: bool = False,
+) -> list[Path | BaseException]:
+    '''
+    Download multiple files concurrently over a single async client.
+
+    Args:
+        urls: The URLs of the files to download.
+        download_dir: The directory to download the files to. Defaults to MEDIA_ROOT_DIR.
+        filenames: Optional filenames (without extension), one per URL. None entries are determined from the response.
+        extension_fallback: Optional extension to use if the extension cannot be determined from the Content-Type header.
+        use_cookies: Whether to use cookies from the cookie file. Defaults to False.
+        concurrency: Maximum number of downloads in flight at once. Defaults to 16.
+        chunk_size: Size of chunks to read in bytes. Defaults to 4MB.
+        timeout: Read timeout in seconds. Defaults to 60.0.
+        headers: Optional custom headers to include in the requests.
+        overwrite: Whether to overwrite existing files. Defaults to False.
+
+    Returns:
+        list[Path | BaseException]: For each URL, in order, the downloaded file path or the exception that made it fail.
+    '''
+    if filenames is None:
+        filenames = [None] * len(urls)
+    if len(filenames) != len(urls):
+        raise ValueError('filenames must have the same length as urls')
+
+    request_headers = _build_request_headers(headers)
+    cookies = get_all_cookies() if use_cookies else None
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(
+        cookies=cookies,
+        timeout=_build_timeout(timeout),
+        limits=_DOWNLOAD_LIMITS,
+        http2=True,
+        follow_redirects=True,
+    ) as client:
+        async def bounded_download(url: str, filename: Optional[str]) -> Path:
+            async with semaphore:
+                return await _async_download_one(
+                    client, url, download_dir, filename, extension_fallback, chunk_size, request_headers, overwrite,
+                )
+
+        return await asyncio.gather(
+            *(bounded_download(url, filename) for url, filename in zip(urls, filenames)),
+            return_exceptions=True,
+        )
+
+
 def hash_file(
     file_path: Path,
     hash_type: Literal['sha256', 'md5', 'sha1'] = 'sha256',
-    buffer_size: Optional[int] = None,
 ) -> str:
     '''
     Hash a file using specified hash algorithm.
-    Note that when dealing with relatively small files, no buffers are needed.
+    hashlib.file_digest streams the file through a fixed-size buffer straight into OpenSSL,
+    so memory stays bounded even for large videos.
     
     Args:
         file_path: The path to the file to hash.
         hash_type: The hash algorithm to use. Defaults to SHA-256.
-        buffer_size: The buffer size to use for reading the file. If None, the file will be read in one go.
     
     Returns:
-        str: The SHA-256 hash of the file.
+        str: The hex digest of the file.
     '''
     with file_path.open('rb', buffering=0) as f:
-        if buffer_size is None:
-            hash_value = hashlib.file_digest(f, hash_type).hexdigest()
-        else:
-            hash_func = getattr(hashlib, hash_type)
-            while True:
-                data = f.read(buffer_size)
-                if not data:
-                    break
-                hash_func.update(data)
-            hash_value = hash_func.hexdigest()
+        hash_value = hashlib.file_digest(f, hash_type).hexdigest()
+        # Hashing is the last full read of a freshly downloaded file, so let the kernel drop it from the page cache
+        # rather than evicting files that are actually hot
+        if hasattr(os, 'posix_fadvise'):  # Not available on macOS
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
     return hash_value
@@ -1,13 +1,122 @@
-import re
+import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import batched
 from pathlib import Path
+from typing import Any
 
+from sqlalchemy import update, func
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models import MediaAsset
-from app.utils.db import to_relative_media_path, to_absolute_media_path
+from app.utils.db import to_absolute_media_path
 from app.utils.download import _detect_file_format, _get_valid_extensions
-from app.utils.helpers import sanitize_filename
+from app.utils.helpers import sanitize_filename, UNSAFE_FILENAME_CHARS
+
+
+# MediaAsset rows are streamed and written back in batches of this size
+_BATCH_SIZE = 1000
+
+# Format detection is I/O-bound (libmagic reads file headers), so use more threads than cores
+_DETECT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# How much of each file to prefetch before format detection
+_PREFETCH_BYTES = 64 * 1024
+
+
+def _flush_updates(db: Session, updates: list[dict[str, Any]]) -> None:
+    '''
+    Write a batch of MediaAsset changes as a single bulk UPDATE and clear the batch.
+    Only flushes: committing mid-loop would close the server-side cursor that yield_per streams from.
+    '''
+    if updates:
+        db.bulk_update_mappings(MediaAsset, updates)
+        updates.clear()
+
+
+def _dir_entries(listings: dict[Path, set[str]], directory: Path) -> set[str]:
+    '''
+    Get the names in a directory, listing it with a single scandir the first time it is seen.
+    This replaces one stat per file with one scandir per directory; callers keep the set current as they rename.
+    '''
+    if directory not in listings:
+        try:
+            with os.scandir(directory) as entries:
+                listings[directory] = {entry.name for entry in entries}
+        except FileNotFoundError:
+            listings[directory] = set()
+    return listings[directory]
+
+
+def _path_exists(listings: dict[Path, set[str]], path: Path) -> bool:
+    '''Check whether a path exists using the cached directory listings.'''
+    return path.name in _dir_entries(listings, path.parent)
+
+
+def _target_exists(path: Path) -> bool:
+    '''
+    Check whether a rename target is taken, asking the filesystem itself.
+    The cached listings compare names case-sensitively, which would miss a clash on case-insensitive filesystems (e.g. APFS).
+    '''
+    return os.path.lexists(path)
+
+
+def _record_rename(listings: dict[Path, set[str]], old_path: Path, new_path: Path) -> None:
+    '''Update the cached directory listings after a rename.'''
+    _dir_entries(listings, old_path.parent).discard(old_path.name)
+    _dir_entries(listings, new_path.parent).add(new_path.name)
+
+
+def _prefetch_headers(paths: list[Path]) -> None:
+    '''
+    Ask the kernel to start reading the start of each file, where libmagic looks for signatures.
+    The hints return immediately, so the reads for a whole batch overlap instead of happening one by one.
+    '''
+    if not hasattr(os, 'posix_fadvise'):  # Not available on macOS
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, _PREFETCH_BYTES, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+
+
+def _dir_fd(dir_fds: dict[Path, int], directory: Path) -> int:
+    '''Open a directory once and reuse its descriptor, so renames inside it skip the full path walk.'''
+    if directory not in dir_fds:
+        dir_fds[directory] = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    return dir_fds[directory]
+
+
+def _rename(dir_fds: dict[Path, int], old_path: Path, new_path: Path) -> None:
+    '''Rename a file relative to its cached parent directory descriptors.'''
+    os.rename(
+        old_path.name,
+        new_path.name,
+        src_dir_fd=_dir_fd(dir_fds, old_path.parent),
+        dst_dir_fd=_dir_fd(dir_fds, new_path.parent),
+    )
+
+
+def _undo_renames(dir_fds: dict[Path, int], renames: list[tuple[Path, Path]]) -> None:
+    '''Revert renames newest first, after their database changes have been rolled back.'''
+    for old_path, new_path in reversed(renames):
+        try:
+            _rename(dir_fds, new_path, old_path)
+        except OSError as e:
+            print(f'Failed to restore {old_path} from {new_path}: {e}')
+
+
+def _close_dir_fds(dir_fds: dict[Path, int]) -> None:
+    '''Close all cached directory descriptors.'''
+    for fd in dir_fds.values():
+        os.close(fd)
+    dir_fds.clear()
 
 
 def fix_mismatched_extensions(db: Session) -> tuple[int, list[str]]:
@@ -20,50 +129,74 @@ def fix_mismatched_extensions(db: Session) -> tuple[int, list[str]]:
     '''
     fixed = 0
     errors = []
+    updates: list[dict[str, Any]] = []
+    listings: dict[Path, set[str]] = {}
 
-    for asset in db.query(MediaAsset).all():
-        absolute_path = to_absolute_media_path(asset.file_path)
-        if not absolute_path.exists():
-            print(f'File not found: {absolute_path}')
-            continue
+    dir_fds: dict[Path, int] = {}
+    renames: list[tuple[Path, Path]] = []
 
-        detected_format = _detect_file_format(absolute_path)
-        if not detected_format:
-            continue
-        valid_exts = _get_valid_extensions(detected_format)
-        if not valid_exts:
-            continue
-        current_ext = absolute_path.suffix.lower()
-        if current_ext in valid_exts:
-            continue
+    try:
+        with ThreadPoolExecutor(max_workers=_DETECT_WORKERS) as executor:
+            for batch in batched(db.query(MediaAsset.id, MediaAsset.file_path).yield_per(_BATCH_SIZE), _BATCH_SIZE):
+                # Detect formats for the whole batch in parallel, then rename and record changes in this thread
+                pending = []
+                for asset in batch:
+                    absolute_path = to_absolute_media_path(asset.file_path)
+                    if not _path_exists(listings, absolute_path):
+                        print(f'File not found: {absolute_path}')
+                        continue
+                    pending.append((asset, absolute_path))
+                paths = [absolute_path for _, absolute_path in pending]
+                _prefetch_headers(paths)
+                detected_formats = executor.map(_detect_file_format, paths)
 
-        # Extension mismatch - rename to preferred extension (first in list)
-        new_ext = valid_exts[0]
-        relative_path = Path(asset.file_path)
-        new_relative_path = relative_path.with_suffix(new_ext)
-        new_absolute_path = to_absolute_media_path(new_relative_path)
+                for (asset, absolute_path), detected_format in zip(pending, detected_formats):
+                    if not detected_format:
+                        continue
+                    valid_exts = _get_valid_extensions(detected_format)
+                    if not valid_exts:
+                        continue
+                    current_ext = absolute_path.suffix.lower()
+                    if current_ext in valid_exts:
+                        continue
 
-        # Handle filename conflicts
-        if new_absolute_path.exists():
-            unique_suffix = uuid.uuid4().hex[:8]
-            new_filename = f'{relative_path.stem}_{unique_suffix}{new_ext}'
-            new_relative_path = relative_path.parent / new_filename
-            new_absolute_path = to_absolute_media_path(new_relative_path)
+                    # Extension mismatch - rename to preferred extension (first in list)
+                    new_ext = valid_exts[0]
+                    relative_path = Path(asset.file_path)
+                    new_relative_path = relative_path.with_suffix(new_ext)
+                    new_absolute_path = to_absolute_media_path(new_relative_path)
 
-        # Rename the file
-        try:
-            absolute_path.rename(new_absolute_path)
-        except OSError as e:
-            errors.append(f'Failed to rename {absolute_path}: {e}')
-            continue
+                    # Handle filename conflicts
+                    if _target_exists(new_absolute_path):
+                        unique_suffix = uuid.uuid4().hex[:8]
+                        new_filename = f'{relative_path.stem}_{unique_suffix}{new_ext}'
+                        new_relative_path = relative_path.parent / new_filename
+                        new_absolute_path = to_absolute_media_path(new_relative_path)
 
-        # Update database record
-        asset.file_path = str(new_relative_path)
-        asset.file_format = new_ext.lstrip('.')
-        fixed += 1
+                    # Rename the file
+                    try:
+                        _rename(dir_fds, absolute_path, new_absolute_path)
+                    except OSError as e:
+                        errors.append(f'Failed to rename {absolute_path}: {e}')
+                        continue
+                    renames.append((absolute_path, new_absolute_path))
+                    _record_rename(listings, absolute_path, new_absolute_path)
 
-    if fixed:
-        db.commit()
+                    # Update database record
+                    updates.append({'id': asset.id, 'file_path': str(new_relative_path), 'file_format': new_ext.lstrip('.')})
+                    fixed += 1
+
+                _flush_updates(db, updates)
+
+        if fixed:
+            db.commit()
+    except BaseException:
+        # Nothing is committed until the end, so put the files back to match the rolled-back database
+        db.rollback()
+        _undo_renames(dir_fds, renames)
+        raise
+    finally:
+        _close_dir_fds(dir_fds)
 
     return fixed, errors
 
@@ -75,15 +208,15 @@ def migrate_media_paths_to_relative(db: Session) -> int:
     Returns:
         Number of records updated.
     '''
-    updated = 0
-    media_assets = db.query(MediaAsset).all()
-
-    for asset in media_assets:
-        relative_path = to_relative_media_path(asset.file_path)
-        if relative_path != asset.file_path:
-            asset.file_path = relative_path
-            updated += 1
-
+    # Making a path relative is a prefix strip, so do it in one UPDATE without fetching rows
+    prefix = f'{settings.MEDIA_ROOT_DIR}{os.sep}'
+    result = db.execute(
+        update(MediaAsset)
+        .where(MediaAsset.file_path.startswith(prefix, autoescape=True))
+        .values(file_path=func.substr(MediaAsset.file_path, len(prefix) + 1))
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.rowcount
     if updated:
         db.commit()
 
@@ -97,57 +230,67 @@ def sanitize_media_filenames(db: Session) -> tuple[int, list[str]]:
     Returns:
         Tuple of (number of files renamed, list of error messages).
     '''
-    # Pattern matching URL-unsafe characters (same as in sanitize_filename)
-    URL_UNSAFE_PATTERN = re.compile(r'[<>:"/\\|?*#%&+=;@!$\'(),\n]')
-    
     renamed = 0
     errors = []
-    media_assets = db.query(MediaAsset).all()
-
-    for asset in media_assets:
-        relative_path = Path(asset.file_path)
-        absolute_path = to_absolute_media_path(relative_path)
-        filename = relative_path.name
-        if not absolute_path.exists():
-            print(f'File not found: {absolute_path}')
-            continue
+    updates: list[dict[str, Any]] = []
+    listings: dict[Path, set[str]] = {}
 
-        # Check if filename contains URL-unsafe characters
-        if not URL_UNSAFE_PATTERN.search(filename):
-            continue
+    dir_fds: dict[Path, int] = {}
+    renames: list[tuple[Path, Path]] = []
 
-        # Generate new sanitized filename
-        stem = relative_path.stem
-        suffix = relative_path.suffix
-        new_filename = sanitize_filename(stem) + suffix
-        new_relative_path = relative_path.parent / new_filename
+    try:
+        for asset in db.query(MediaAsset.id, MediaAsset.file_path).yield_per(_BATCH_SIZE):
+            relative_path = Path(asset.file_path)
+            absolute_path = to_absolute_media_path(relative_path)
+            filename = relative_path.name
+            if not _path_exists(listings, absolute_path):
+                print(f'File not found: {absolute_path}')
+                continue
 
-        # Get absolute paths
-        old_absolute = to_absolute_media_path(relative_path)
-        new_absolute = to_absolute_media_path(new_relative_path)
+            # Check if filename contains URL-unsafe characters
+            if UNSAFE_FILENAME_CHARS.isdisjoint(filename):
+                continue
 
-        # Check if source file exists
-        if not old_absolute.exists():
-            errors.append(f'Source file not found: {old_absolute}')
-            continue
-
-        # Handle filename conflicts
-        if new_absolute.exists() and new_absolute != old_absolute:
-            # Append short UUID to make unique
-            unique_suffix = uuid.uuid4().hex[:8]
-            new_filename = f'{sanitize_filename(stem)}_{unique_suffix}{suffix}'
+            # Generate new sanitized filename
+            sanitized_stem = sanitize_filename(relative_path.stem)
+            suffix = relative_path.suffix
+            new_filename = sanitized_stem + suffix
             new_relative_path = relative_path.parent / new_filename
+
+            # Get absolute paths
+            old_absolute = absolute_path
             new_absolute = to_absolute_media_path(new_relative_path)
 
-        # Rename the file
-        try:
-            old_absolute.rename(new_absolute)
-            asset.file_path = str(new_relative_path)
+            # Handle filename conflicts
+            if _target_exists(new_absolute) and new_absolute != old_absolute:
+                # Append short UUID to make unique
+                unique_suffix = uuid.uuid4().hex[:8]
+                new_filename = f'{sanitized_stem}_{unique_suffix}{suffix}'
+                new_relative_path = relative_path.parent / new_filename
+                new_absolute = to_absolute_media_path(new_relative_path)
+
+            # Rename the file
+            try:
+                _rename(dir_fds, old_absolute, new_absolute)
+            except OSError as e:
+                errors.append(f'Failed to rename {old_absolute}: {e}')
+                continue
+            renames.append((old_absolute, new_absolute))
+            _record_rename(listings, old_absolute, new_absolute)
+            updates.append({'id': asset.id, 'file_path': str(new_relative_path)})
             renamed += 1
-        except OSError as e:
-            errors.append(f'Failed to rename {old_absolute}: {e}')
+            if len(updates) >= _BATCH_SIZE:
+                _flush_updates(db, updates)
 
-    if renamed:
-        db.commit()
+        _flush_updates(db, updates)
+        if renamed:
+            db.commit()
+    except BaseException:
+        # Nothing is committed until the end, so put the files back to match the rolled-back database
+        db.rollback()
+        _undo_renames(dir_fds, renames)
+        raise
+    finally:
+        _close_dir_fds(dir_fds)
 
     return renamed, errors
@@ -1,7 +1,13 @@
-import re
-from urllib.parse import urlsplit, urlunsplit
+import codecs
+from functools import lru_cache
 
 
+# Characters that are unsafe in filenames or URLs, see sanitize_filename
+UNSAFE_FILENAME_CHARS = frozenset('<>:"/\\|?*#%&+=;@!$\'(),\n')
+_SANITIZE_TABLE = str.maketrans(dict.fromkeys(UNSAFE_FILENAME_CHARS, '_'))
+
+
+@lru_cache(maxsize=4096)
 def remove_query_params(url: str) -> str:
     '''
     Remove all query parameters from a URL.
@@ -12,9 +18,8 @@ def remove_query_params(url: str) -> str:
     Returns:
         The URL without query parameters
     '''
-    parsed = urlsplit(url)
-    cleaned = urlunsplit(parsed._replace(query='', fragment=''))
-    return cleaned
+    # Everything from the first '?' or '#' is query or fragment, so there is no need to parse the whole URL
+    return url.partition('?')[0].partition('#')[0]
 
 
 def unescape_unicode(text: str) -> str:
@@ -27,9 +32,11 @@ def unescape_unicode(text: str) -> str:
     Returns:
         The unescaped string
     '''
-    return text.encode('utf-8').decode('unicode-escape')
+    # The codec accepts str directly (encoding it as UTF-8 in C), so there is no intermediate bytes object
+    return codecs.decode(text, 'unicode_escape')
 
 
+@lru_cache(maxsize=4096)
 def sanitize_filename(filename: str) -> str:
     '''
     Sanitize a filename to make it safe for filesystem operations and URLs.
@@ -44,4 +51,4 @@ def sanitize_filename(filename: str) -> str:
     Returns:
         The sanitized filename
     '''
-    return re.sub(r'[<>:"/\\|?*#%&+=;@!$\'(),\n]', '_', filename)
+    return filename.translate(_SANITIZE_TABLE)
@@ -1,4 +1,6 @@
-from redis import Redis
+from functools import lru_cache
+
+from redis import ConnectionPool, Redis
 from rq import Queue, Retry
 
 from app.models import Job
@@ -6,11 +8,19 @@ from app.workers import process_download_job
 from app.config import settings
 
 
+# Shared by every Redis client in the process, so sockets are reused instead of reconnecting per call
+_POOL = ConnectionPool.from_url(settings.REDIS_URL, max_connections=settings.REDIS_MAX_CONN)
+
+# Exponential backoff between retries of a download job, starting at 30 seconds
+_RETRY_INTERVALS = tuple(30 << i for i in range(settings.JOB_RETRIES + 1))
+
+
 def get_redis_connection() -> Redis:
-    '''Get a Redis connection using settings.'''
-    return Redis.from_url(settings.REDIS_URL)
+    '''Get a Redis connection backed by the shared connection pool.'''
+    return Redis(connection_pool=_POOL)
 
 
+@lru_cache
 def get_queue(name: str = 'downloads') -> Queue:
     '''Get an RQ queue instance using settings.'''
     redis_conn = get_redis_connection()
@@ -20,6 +30,16 @@ def get_queue(name: str = 'downloads') -> Queue:
 def enqueue_job(job: Job) -> None:
     '''Enqueue a job to the queue.'''
     queue = get_queue()
-    base_interval = 30  # seconds
-    intervals = [base_interval * 2**i for i in range(settings.JOB_RETRIES + 1)]
-    queue.enqueue(process_download_job, args=(job.id,), retry=Retry(max=settings.JOB_RETRIES, interval=intervals))
+    queue.enqueue(process_download_job, args=(job.id,), retry=Retry(max=settings.JOB_RETRIES, interval=_RETRY_INTERVALS))
+
+
+def enqueue_jobs(jobs: list[Job]) -> None:
+    '''Enqueue many jobs to the queue atomically, sending them to Redis in a single MULTI/EXEC pipeline.'''
+    if not jobs:
+        return
+    queue = get_queue()
+    retry = Retry(max=settings.JOB_RETRIES, interval=_RETRY_INTERVALS)
+    job_datas = [Queue.prepare_data(process_download_job, args=(job.id,), retry=retry) for job in jobs]
+    with queue.connection.pipeline() as pipe:
+        queue.enqueue_many(job_datas, pipeline=pipe)
+        pipe.execute()
@@ -1,5 +1,6 @@
 import traceback
-from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.orm import Session, load_only, scoped_session
 from sqlalchemy.orm.attributes import flag_modified
 
 from app.db import SessionLocal
@@ -10,6 +11,10 @@ from app.handlers import get_handler_from_share
 from app.utils.db import get_or_create_post_by_platform_info
 
 
+# Thread-local session reused across the jobs a worker runs, instead of creating one per job
+ScopedSession = scoped_session(SessionLocal)
+
+
 def process_download_job(job_id: int) -> None:
     '''
     Process a download job.
@@ -23,9 +28,12 @@ def process_download_job(job_id: int) -> None:
     Args:
         job_id: The ID of the job to process
     '''
-    db: Session = SessionLocal()
+    db: Session = ScopedSession()
     try:
-        job = db.get(Job, job_id)
+        job = db.get(
+            Job, job_id,
+            options=[load_only(Job.status, Job.share_url, Job.share_text, Job.error, Job.post_id)],
+        )
         if not job:
             raise ValueError(f'Job {job_id} not found')
         # Idempotency guard - allow retries if job is processing
@@ -33,9 +41,13 @@ def process_download_job(job_id: int) -> None:
             return
         
         # Mark pending jobs as processing
+        # Only flushed by default: it is committed together with the rest of the job's writes
         if job.status == JobStatus.pending:
             job.status = JobStatus.processing
-            db.commit()
+            if settings.COMMIT_PROCESSING_STATE:
+                db.commit()
+            else:
+                db.flush()
         
         # Get handler from the share URL
         handler = get_handler_from_share(job.share_url)
@@ -59,18 +71,22 @@ def process_download_job(job_id: int) -> None:
         if handler.PLATFORM is None:
             raise ValueError(f'Handler {handler.__class__.__name__} does not have PLATFORM set')
         post = get_or_create_post_by_platform_info(db=db, platform=handler.PLATFORM, post_info=post_info)
-        job.post_id = post.id
-        db.commit()
         
         # Download the post (handler will check if already downloaded)
         post_medias = handler.download(db=db, post=post)
-        job.status = JobStatus.completed
+        
+        # Link the post and mark the job completed in a single statement
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(post_id=post.id, status=JobStatus.completed)
+        )
         db.commit()
         
     except Exception as e:
         # Store error for debugging and track retry attempts
         db.rollback()
-        job = db.get(Job, job_id)
+        job = db.get(Job, job_id, options=[load_only(Job.status, Job.error)])
         if job:
             # Store error information (append to list if retrying)
             error_info = {
@@ -101,4 +117,5 @@ def process_download_job(job_id: int) -> None:
         # Always raise the exception so RQ knows to retry
         raise
     finally:
-        db.close()
+        # End any transaction left open so its connection returns to the pool, keeping the session for the next job
+        db.rollback()
@@ -1,27 +1,74 @@
 import argparse
-import json
+import asyncio
+import os
+import random
 import sys
 import time
+from collections import Counter
 from datetime import datetime
+from functools import lru_cache
+from itertools import batched
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional
 
 import httpx
+import orjson
 from tqdm import tqdm
 
 
 API_ROOT_URL = 'http://localhost:8000/api'
+SEP = '=' * 50  # Separator line around summaries
+SUBMIT_CHUNK_SIZE = 200  # Maximum number of shares sent in one bulk request
+SUBMIT_CONCURRENCY = 4  # Maximum number of bulk requests in flight at once
+SUBMIT_RETRIES = 3  # Extra attempts for job submissions that fail before reaching the server
+PROGRESS_BUFFER_SIZE = 1 << 16  # Bytes of progress updates buffered before writing
+SNAPSHOT_INTERVAL = 300.0  # Seconds between full snapshots of the jobs file during a run
+POLL_DELAYS = (0.2, 0.2, 0.5, 0.5, 1.0)  # Seconds between the first polls of a job, before settling on the poll interval
+RETRY_BACKOFF_BASE = 1.0  # Seconds
+RETRY_BACKOFF_CAP = 10.0  # Seconds
+
+# Cleared once the server turns out not to have the batch status endpoint
+_batch_status_supported = True
 
 
 # ============================================================================
 # Helper Functions for API Requests
 # ============================================================================
 
-def request_download_job(share: str) -> dict:
+def create_client(base_url: str = API_ROOT_URL) -> httpx.AsyncClient:
+    '''
+    Create the HTTP client shared by all API requests in a run.
+    Keeping connections alive lets concurrent requests reuse them instead of reconnecting each time.
+    
+    Args:
+        base_url: Base URL of the API server that request paths are resolved against
+    '''
+    return httpx.AsyncClient(
+        base_url=base_url,
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    )
+
+
+async def _post_with_retry(client: httpx.AsyncClient, url: str, payload: dict) -> httpx.Response:
+    '''
+    POST to the API, retrying request errors with jittered exponential backoff.
+    Retrying is safe because the server reuses the existing job for a share it has already seen.
+    '''
+    for attempt in range(SUBMIT_RETRIES):
+        try:
+            return await client.post(url, json=payload, timeout=60.0)
+        except httpx.RequestError:
+            await asyncio.sleep(min(RETRY_BACKOFF_BASE * 2**attempt, RETRY_BACKOFF_CAP) + random.random() * 0.25)
+    return await client.post(url, json=payload, timeout=60.0)
+
+
+async def request_download_job(client: httpx.AsyncClient, share: str) -> dict:
     '''
     Request a download job from the API.
     
     Args:
+        client: The HTTP client to send the request with
         share: The share string/URL to download
         
     Returns:
@@ -31,18 +78,39 @@ def request_download_job(share: str) -> dict:
         httpx.HTTPStatusError: If the HTTP request fails
         httpx.RequestError: If the request fails
     '''
-    url = f'{API_ROOT_URL}/download'
-    with httpx.Client(timeout=60.0) as client:
-        response = client.post(url, json={'share': share})
-        response.raise_for_status()
-        return response.json()
+    url = '/download'
+    response = await _post_with_retry(client, url, {'share': share})
+    response.raise_for_status()
+    return response.json()
+
+
+async def request_download_jobs(client: httpx.AsyncClient, shares: list[str]) -> list[dict]:
+    '''
+    Request download jobs for many shares from the API in a single request.
+    
+    Args:
+        client: The HTTP client to send the request with
+        shares: The share strings/URLs to download
+        
+    Returns:
+        list: One result per share, in order, with either 'job' or 'error' set
+        
+    Raises:
+        httpx.HTTPStatusError: If the HTTP request fails
+        httpx.RequestError: If the request fails
+    '''
+    url = '/download/bulk'
+    response = await _post_with_retry(client, url, {'shares': shares})
+    response.raise_for_status()
+    return response.json()
 
 
-def poll_job_status(job_id: int) -> dict:
+async def poll_job_status(client: httpx.AsyncClient, job_id: int) -> dict:
     '''
     Poll the status of a job from the API.
     
     Args:
+        client: The HTTP client to send the request with
         job_id: The job ID to poll
         
     Returns:
@@ -52,11 +120,31 @@ def poll_job_status(job_id: int) -> dict:
         httpx.HTTPStatusError: If the HTTP request fails
         httpx.RequestError: If the request fails
     '''
-    url = f'{API_ROOT_URL}/download/{job_id}'
-    with httpx.Client(timeout=30.0) as client:
-        response = client.get(url)
-        response.raise_for_status()
-        return response.json()
+    url = f'/download/{job_id}'
+    response = await client.get(url, timeout=30.0)
+    response.raise_for_status()
+    return response.json()
+
+
+async def poll_job_statuses(client: httpx.AsyncClient, job_ids: list[int]) -> list[dict]:
+    '''
+    Poll the status of many jobs from the API in a single request.
+    
+    Args:
+        client: The HTTP client to send the request with
+        job_ids: The job IDs to poll
+        
+    Returns:
+        list: Job status data for each job that exists, in no particular order
+        
+    Raises:
+        httpx.HTTPStatusError: If the HTTP request fails
+        httpx.RequestError: If the request fails
+    '''
+    url = '/download/batch-status'
+    response = await client.post(url, json={'ids': job_ids}, timeout=30.0)
+    response.raise_for_status()
+    return response.json()
 
 
 # ============================================================================
@@ -83,194 +171,306 @@ def load_or_convert_jobs_file(input_file: Path) -> tuple[list[dict], Path]:
         sys.exit(1)
     
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            # Try to parse as JSON
-            try:
-                jobs = json.load(f)
-                if not isinstance(jobs, list):
-                    raise ValueError('JSON file must contain a list of jobs')
-                print(f'✓ Loaded {len(jobs)} jobs from JSON file: {input_file}')
-                return jobs, input_file
-            except json.JSONDecodeError:
-                # Not JSON, convert it
-                json_file = input_file.parent / f'{input_file.stem}.json'
-                
-                # Check if JSON file already exists
-                if json_file.exists():
-                    print(f'\n⚠ JSON file already exists: {json_file}')
-                    while True:
-                        response = input('Use existing JSON file? (y/n): ').strip().lower()
-                        if response in ('y', 'yes'):
-                            # Use existing JSON file
-                            print(f'Using existing JSON file: {json_file}')
-                            with open(json_file, 'r', encoding='utf-8') as jf:
-                                jobs = json.load(jf)
-                            if not isinstance(jobs, list):
-                                raise ValueError('JSON file must contain a list of jobs')
-                            print(f'✓ Loaded {len(jobs)} jobs from existing JSON file')
-                            return jobs, json_file
-                        elif response in ('n', 'no'):
-                            # Overwrite with new conversion
-                            print(f'Converting input file to JSON format (overwriting {json_file})...')
-                            process_shares_to_json(input_file, json_file)
-                            with open(json_file, 'r', encoding='utf-8') as jf:
-                                jobs = json.load(jf)
-                            return jobs, json_file
-                        else:
-                            print('Please enter "y" or "n"')
-                
-                # JSON file doesn't exist, convert normally
-                print(f'Converting input file to JSON format...')
-                process_shares_to_json(input_file, json_file)
-                with open(json_file, 'r', encoding='utf-8') as jf:
-                    jobs = json.load(jf)
-                return jobs, json_file
+        content = input_file.read_bytes()
+        # Try to parse as JSON
+        try:
+            jobs = orjson.loads(content)
+            if not isinstance(jobs, list):
+                raise ValueError('JSON file must contain a list of jobs')
+            print(f'✓ Loaded {len(jobs)} jobs from JSON file: {input_file}')
+            return jobs, input_file
+        except orjson.JSONDecodeError:
+            # Not JSON, convert it
+            json_file = input_file.parent / f'{input_file.stem}.json'
+            
+            # Check if JSON file already exists
+            if json_file.exists():
+                print(f'\n⚠ JSON file already exists: {json_file}')
+                while True:
+                    response = input('Use existing JSON file? (y/n): ').strip().lower()
+                    if response in ('y', 'yes'):
+                        # Use existing JSON file
+                        print(f'Using existing JSON file: {json_file}')
+                        jobs = orjson.loads(json_file.read_bytes())
+                        if not isinstance(jobs, list):
+                            raise ValueError('JSON file must contain a list of jobs')
+                        print(f'✓ Loaded {len(jobs)} jobs from existing JSON file')
+                        return jobs, json_file
+                    elif response in ('n', 'no'):
+                        # Overwrite with new conversion
+                        print(f'Converting input file to JSON format (overwriting {json_file})...')
+                        process_shares_to_json(input_file, json_file)
+                        jobs = orjson.loads(json_file.read_bytes())
+                        return jobs, json_file
+                    else:
+                        print('Please enter "y" or "n"')
+            
+            # JSON file doesn't exist, convert normally
+            print(f'Converting input file to JSON format...')
+            process_shares_to_json(input_file, json_file)
+            jobs = orjson.loads(json_file.read_bytes())
+            return jobs, json_file
     except Exception as e:
         print(f'Error reading input file: {e}', file=sys.stderr)
         sys.exit(1)
 
 
-def save_jobs_to_file(jobs: list[dict], json_file: Path) -> None:
+def save_jobs_to_file(jobs: list[dict], json_file: Path, verbose: bool = True) -> bool:
     '''
-    Save jobs to a JSON file.
+    Save jobs to a JSON file, replacing it atomically so a crash never leaves a partial file.
     
     Args:
         jobs: List of job dictionaries
         json_file: Path to the JSON file to save
+        verbose: Whether to report where the progress was saved
+        
+    Returns:
+        True if the file was saved, False otherwise
     '''
     try:
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(jobs, f, indent=2, ensure_ascii=False)
-        print(f'\n💾 Progress saved to: {json_file}')
+        tmp_file = json_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(jobs, option=orjson.OPT_INDENT_2))
+            # Make sure the data is on disk before the rename makes it the jobs file
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, json_file)
+        if verbose:
+            print(f'\n💾 Progress saved to: {json_file}')
+        return True
     except Exception as e:
         print(f'\n⚠ Error saving progress: {e}', file=sys.stderr)
+        return False
+
+
+def get_progress_file(json_file: Path) -> Path:
+    '''Get the path of the JSON Lines file that job updates are appended to during a run.'''
+    # A suffix of its own, so it can never share a name with an input shares file
+    return json_file.with_name(json_file.name + '.progress.jsonl')
+
+
+def append_job_update(progress_log: BinaryIO, job_index: int, job: dict) -> None:
+    '''
+    Append a job's current status and data to the progress log as one JSON line.
+    
+    Args:
+        progress_log: Progress file opened for binary appending
+        job_index: Index of the job in the jobs list
+        job: The job dictionary
+    '''
+    update = {'idx': job_index, 'status': job.get('status'), 'data': job.get('data')}
+    progress_log.write(orjson.dumps(update) + b'\n')
+
+
+def replay_progress(jobs: list[dict], json_file: Path) -> int:
+    '''
+    Apply the job updates left in the progress log by an earlier run that did not finish saving.
+    
+    Args:
+        jobs: List of job dictionaries to update
+        json_file: Path to the JSON file the jobs were loaded from
+        
+    Returns:
+        Number of updates applied
+    '''
+    progress_file = get_progress_file(json_file)
+    if not progress_file.exists():
+        return 0
+    
+    applied = 0
+    with open(progress_file, 'rb') as f:
+        for line in f:
+            try:
+                update = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                # The last line may have been cut off by a crash
+                break
+            job_index = update['idx']
+            if job_index < len(jobs):
+                jobs[job_index]['status'] = update['status']
+                jobs[job_index]['data'] = update['data']
+                applied += 1
+    return applied
+
+
+def checkpoint_progress(jobs: list[dict], json_file: Path, progress_log: BinaryIO) -> None:
+    '''
+    Snapshot all jobs to the JSON file and start the progress log over, since the snapshot includes its updates.
+    
+    Args:
+        jobs: List of job dictionaries
+        json_file: Path to the JSON file to save
+        progress_log: Progress file opened for binary appending
+    '''
+    if save_jobs_to_file(jobs, json_file, verbose=False):
+        progress_log.truncate(0)
+
+
+def finalize_progress(jobs: list[dict], json_file: Path) -> None:
+    '''
+    Fold the run's progress into the JSON file, removing the progress log once it is saved.
+    
+    Args:
+        jobs: List of job dictionaries
+        json_file: Path to the JSON file to save
+    '''
+    if save_jobs_to_file(jobs, json_file):
+        get_progress_file(json_file).unlink(missing_ok=True)
 
 
 # ============================================================================
 # Helper Functions for Queue Management
 # ============================================================================
 
-def poll_all_jobs(
-    active_queue: list[tuple[int, int, str]],
+@lru_cache(maxsize=1024)
+def _truncate(text: str, max_length: int = 50) -> str:
+    '''Shorten text for display, marking cut text with an ellipsis.'''
+    return f'{text[:max_length]}…' if len(text) > max_length else text
+
+
+async def poll_all_jobs(
+    client: httpx.AsyncClient,
+    active_queue: dict[int, tuple[list[int], str]],
     jobs: list[dict],
-) -> list[tuple[int, int, str]]:
+    progress_log: BinaryIO,
+) -> list[int]:
     '''
-    Poll status of all jobs in the active queue.
+    Poll status of all jobs in the active queue with a single batch request,
+    falling back to concurrent per-job requests if the server does not support it.
     
     Args:
-        active_queue: List of (job_index, job_id, share) tuples
+        client: The HTTP client to send the requests with
+        active_queue: Mapping of job_id to (job_indices, share), as identical shares share one server job
         jobs: List of all job dictionaries to update
+        progress_log: Progress file that status changes are appended to
         
     Returns:
-        List of queue items that are completed/failed/canceled and should be removed
+        List of job IDs that are completed/failed/canceled and should be removed
     '''
-    jobs_to_remove = []
+    global _batch_status_supported
+    done_ids = []
     
-    for queue_item in active_queue:
-        job_idx, job_id, share = queue_item
+    results = None
+    if _batch_status_supported:
         try:
-            job_data = poll_job_status(job_id)
-            api_status = job_data.get('status', 'pending')
-            
-            # If API returns 'pending', keep it as 'processing' since it's in our active queue
-            # Otherwise, use the API status (completed, failed, etc.)
-            if api_status == 'pending':
-                status = 'processing'
-            else:
-                status = api_status
-            
-            # Update job in the jobs list
+            statuses = {job_data['id']: job_data for job_data in await poll_job_statuses(client, list(active_queue))}
+            results = [statuses.get(job_id) for job_id in active_queue]
+        except httpx.HTTPStatusError as e:
+            # Servers without the endpoint answer 405, since the path also matches GET /download/{job_id}
+            if e.response.status_code not in (404, 405):
+                tqdm.write(f'⚠ Polling {len(active_queue)} jobs failed with HTTP {e.response.status_code}, will retry')
+                return done_ids
+            tqdm.write('⚠ Server does not support batch status polling, polling jobs one by one')
+            _batch_status_supported = False
+        except httpx.RequestError as e:
+            tqdm.write(f'⚠ Polling {len(active_queue)} jobs failed: {e}, will retry')
+            return done_ids
+    if results is None:
+        results = await asyncio.gather(
+            *(poll_job_status(client, job_id) for job_id in active_queue),
+            return_exceptions=True,
+        )
+    
+    for (job_id, (job_indices, share)), job_data in zip(active_queue.items(), results):
+        # Continue with the other jobs even if polling one fails
+        if job_data is None or isinstance(job_data, BaseException):
+            continue
+        api_status = job_data.get('status', 'pending')
+        
+        # If API returns 'pending', keep it as 'processing' since it's in our active queue
+        # Otherwise, use the API status (completed, failed, etc.)
+        if api_status == 'pending':
+            status = 'processing'
+        else:
+            status = api_status
+        
+        # Update every job in the jobs list that maps to this server job
+        for job_idx in job_indices:
             if job_idx < len(jobs):
+                status_changed = jobs[job_idx].get('status') != status
                 jobs[job_idx]['status'] = status
                 jobs[job_idx]['data'] = job_data
-            
-            if status in ('completed', 'failed', 'canceled'):
-                jobs_to_remove.append(queue_item)
-                share_display = share[:50] + '...' if len(share) > 50 else share
-                if status == 'completed':
-                    tqdm.write(f'✓ Job {job_id} completed: {share_display}')
-                else:
-                    tqdm.write(f'✗ Job {job_id} {status}: {share_display}')
-        except Exception:
-            # Continue polling other jobs even if one fails
-            continue
+                if status_changed:
+                    append_job_update(progress_log, job_idx, jobs[job_idx])
+        
+        if status in ('completed', 'failed', 'canceled'):
+            done_ids.append(job_id)
+            share_display = _truncate(share)
+            if status == 'completed':
+                tqdm.write(f'✓ Job {job_id} completed: {share_display}')
+            else:
+                tqdm.write(f'✗ Job {job_id} {status}: {share_display}')
     
-    return jobs_to_remove
+    return done_ids
 
 
-def submit_job_to_queue(
-    job: dict,
-    job_index: int,
-) -> tuple[Optional[int], Optional[dict]]:
+async def submit_jobs_to_queue(client: httpx.AsyncClient, shares: list[str]) -> list[tuple[Optional[int], Optional[dict]]]:
     '''
-    Submit a job to the download queue.
+    Submit a batch of shares to the download queue in one request.
     
     Args:
-        job: Job dictionary with 'share' field
-        job_index: Index of the job in the jobs list
+        client: The HTTP client to send the request with
+        shares: The share strings to submit
         
     Returns:
-        tuple: (job_id, response_data) on success, (None, error_data) on failure
+        list: One tuple per share, (job_id, job_data) on success, (None, error_data) on failure
     '''
-    share = job.get('share', '')
-    if not share:
-        return None, None
-    
     try:
-        response_data = request_download_job(share)
-        job_id = response_data.get('job_id')
-        
-        if job_id:
-            share_display = share[:50] + '...' if len(share) > 50 else share
-            tqdm.write(f'→ Queued job {job_id}: {share_display}')
-            return job_id, response_data
-        else:
-            error_data = {'error': 'No job_id in response', 'response': response_data}
-            tqdm.write(f'✗ Failed to get job_id for: {share}')
-            return None, error_data
-            
+        results = await request_download_jobs(client, shares)
     except httpx.HTTPStatusError as e:
         error_data = {
             'error': f'HTTP {e.response.status_code}',
             'message': e.response.text
         }
-        tqdm.write(f'✗ HTTP error for "{share}": {e.response.status_code}')
-        return None, error_data
-        
+        tqdm.write(f'✗ HTTP error submitting {len(shares)} jobs: {e.response.status_code}')
+        return [(None, error_data)] * len(shares)
     except httpx.RequestError as e:
         error_data = {
             'error': 'Request error',
             'message': str(e)
         }
-        tqdm.write(f'✗ Request error for "{share}": {e}')
-        return None, error_data
-        
+        tqdm.write(f'✗ Request error submitting {len(shares)} jobs: {e}')
+        return [(None, error_data)] * len(shares)
     except Exception as e:
         error_data = {
             'error': 'Unexpected error',
             'message': str(e)
         }
-        tqdm.write(f'✗ Unexpected error for "{share}": {e}')
-        return None, error_data
+        tqdm.write(f'✗ Unexpected error submitting {len(shares)} jobs: {e}')
+        return [(None, error_data)] * len(shares)
+    
+    submitted = []
+    for share, result in zip(shares, results):
+        job_data = result.get('job')
+        if job_data and job_data.get('id'):
+            share_display = _truncate(share)
+            tqdm.write(f'→ Queued job {job_data["id"]}: {share_display}')
+            submitted.append((job_data['id'], job_data))
+        else:
+            error_data = {'error': result.get('error') or 'No job in response', 'response': result}
+            tqdm.write(f'✗ Failed to get job_id for: {share}')
+            submitted.append((None, error_data))
+    return submitted
 
 
-def calculate_job_statistics(jobs: list[dict], active_queue: list) -> dict[str, int]:
+def calculate_job_statistics(jobs: list[dict], active_queue: dict) -> dict[str, int]:
     '''
     Calculate statistics about job processing.
     
     Args:
         jobs: List of all job dictionaries
-        active_queue: List of active jobs in queue
+        active_queue: Active jobs in queue, keyed by job ID, with the job indices each one covers
         
     Returns:
         Dictionary with 'completed', 'failed', 'pending', 'processing', 'in_queue' counts
     '''
+    counts = Counter(job.get('status') for job in jobs)
     return {
-        'completed': sum(1 for job in jobs if job.get('status') == 'completed'),
-        'failed': sum(1 for job in jobs if job.get('status') in ('failed', 'error', 'canceled')),
-        'pending': sum(1 for job in jobs if job.get('status') == 'pending'),
-        'processing': sum(1 for job in jobs if job.get('status') == 'processing'),
-        'in_queue': len(active_queue)
+        'completed': counts['completed'],
+        'failed': counts['failed'] + counts['error'] + counts['canceled'],
+        'pending': counts['pending'],
+        'processing': counts['processing'],
+        'in_queue': sum(len(job_indices) for job_indices, _ in active_queue.values())
     }
 
 
@@ -278,11 +478,12 @@ def calculate_job_statistics(jobs: list[dict], active_queue: list) -> dict[str,
 # Main Functions
 # ============================================================================
 
-def download_share(share: str, silent: bool = False) -> bool:
+async def download_share(client: httpx.AsyncClient, share: str, silent: bool = False) -> bool:
     '''
     Request download for a single share string.
     
     Args:
+        client: The HTTP client to send the request with
         share: The share string/URL to download
         silent: If True, suppress output messages
         
@@ -295,7 +496,7 @@ def download_share(share: str, silent: bool = False) -> bool:
         return False
     
     try:
-        response_data = request_download_job(share)
+        response_data = await request_download_job(client, share)
         if not silent:
             print(f'✓ Successfully requested download for: {share}')
         return True
@@ -333,55 +534,50 @@ def process_shares_to_json(input_file: Path, output_file: Path) -> None:
     
     print(f'Reading shares from: {input_file}')
     
-    # Read all lines from the input file and filter out empty lines
+    # Stream the input file: each line might be a share, a "good" line marks the share right before it
+    jobs = []
     try:
         with open(input_file, 'r', encoding='utf-8') as f:
-            lines = list(filter(lambda line: line.strip(), f))
+            last_job = None
+            for line in f:
+                # Skip empty lines
+                line = line.strip()
+                if not line:
+                    continue
+                
+                # "good" lines only count when they directly follow a share
+                if line.lower() == 'good':
+                    if last_job is not None:
+                        last_job['crawl_creator'] = True
+                        last_job = None
+                    continue
+                
+                last_job = {
+                    'share': line,
+                    'crawl_creator': False,
+                    'status': 'pending',
+                    'data': None,
+                }
+                jobs.append(last_job)
     except Exception as e:
         print(f'Error reading input file: {e}', file=sys.stderr)
         sys.exit(1)
     
-    jobs = []
-    # Process lines: each line might be a share, next line might be "good"
-    i = 0
-    while i < len(lines):
-        # Skip empty lines
-        line = lines[i].strip()
-        if not line:
-            i += 1
-            continue
-        
-        # Skip "good" lines (they should only appear after a share)
-        if line.lower() == 'good':
-            i += 1
-            continue
-        # Check if next line is "good"
-        crawl_creator = False
-        if i + 1 < len(lines) and lines[i + 1].strip().lower() == 'good':
-            crawl_creator = True
-            i += 1
-        
-        job = {
-            'share': line,
-            'crawl_creator': crawl_creator,
-            'status': 'pending',
-            'data': None,
-        }
-        jobs.append(job)
-        i += 1
-    
-    # Write jobs to output JSON file
+    # Write jobs to output JSON file, replacing any existing one atomically
+    if not save_jobs_to_file(jobs, output_file, verbose=False):
+        sys.exit(1)
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(jobs, f, indent=2, ensure_ascii=False)
-        print(f'\n✓ Successfully wrote {len(jobs)} jobs to: {output_file}')
-    except Exception as e:
-        print(f'Error writing output file: {e}', file=sys.stderr)
+        # Progress logged against a previous version of this file no longer applies
+        get_progress_file(output_file).unlink(missing_ok=True)
+    except OSError as e:
+        print(f'Error removing stale progress file: {e}', file=sys.stderr)
         sys.exit(1)
+    print(f'\n✓ Successfully wrote {len(jobs)} jobs to: {output_file}')
     return output_file
 
 
-def batch_download_from_file(
+async def batch_download_from_file(
+    client: httpx.AsyncClient,
     input_file: Path,
     queue_size: int = 15,
     poll_interval: float = 2.0,
@@ -392,19 +588,23 @@ def batch_download_from_file(
     Batch download from a file with optional queue management and polling.
     
     First converts the file to JSON if needed. If wait=True, processes jobs with a queue
-    of size n, requests the API for each job and adds it to the queue. Every X seconds,
-    polls /download/<job_id> to check if the job is completed. If wait=False, simply
+    of size n, requests the API for each job and adds it to the queue. Each job is polled at
+    /download/<job_id> after short delays at first, then every poll_interval seconds, to check
+    if the job is completed. If wait=False, simply
     submits all unprocessed jobs to the API server and exits.
     
     Args:
+        client: The HTTP client to send API requests with
         input_file: Path to the input file (can be text or JSON)
         queue_size: Maximum number of concurrent jobs in the queue (only used if wait=True)
-        poll_interval: Interval in seconds between polling job status (only used if wait=True)
+        poll_interval: Longest interval in seconds between polls of a job's status (only used if wait=True)
         wait: If True, manage queue and poll for completion. If False, just submit all jobs and exit.
         retry: If True, also retry jobs with status 'failed' or 'error' (default: False)
     '''
     # Load or convert jobs file
     jobs, json_file = load_or_convert_jobs_file(input_file)
+    if replayed := replay_progress(jobs, json_file):
+        print(f'✓ Restored {replayed} job updates from an unfinished run')
     
     if not jobs:
         print('No jobs to process.')
@@ -416,20 +616,19 @@ def batch_download_from_file(
         submitted = 0
         skipped = 0
         failed = 0
+        pending_indices = []
         
-        with tqdm(total=len(jobs), desc='Submitting jobs', unit='job') as pbar:
+        with tqdm(total=len(jobs), desc='Submitting jobs', unit='job', mininterval=0.5) as pbar:
             for job_index, job in enumerate(jobs):
                 # Skip empty shares
                 if not job.get('share'):
                     skipped += 1
-                    pbar.update(1)
                     continue
                 
                 # Skip if already completed or canceled
                 job_status = job.get('status', 'pending')
                 if job_status in ('completed', 'canceled'):
                     skipped += 1
-                    pbar.update(1)
                     continue
                 
                 # Handle failed/error jobs based on retry flag
@@ -440,36 +639,43 @@ def batch_download_from_file(
                         jobs[job_index]['status'] = 'pending'
                     else:
                         skipped += 1
-                        pbar.update(1)
                         continue
                 
                 # Skip if already has a job_id (already submitted) and not retrying
-                if job.get('data') and job['data'].get('job_id'):
+                if job.get('data') and job['data'].get('id'):
                     skipped += 1
-                    pbar.update(1)
                     continue
                 
-                # Submit job to API
-                job_id, response_data = submit_job_to_queue(job, job_index)
-                
-                if job_id:
-                    jobs[job_index]['status'] = 'processing'
-                    jobs[job_index]['data'] = response_data
-                    submitted += 1
-                else:
-                    jobs[job_index]['status'] = 'error'
-                    jobs[job_index]['data'] = response_data or {'error': 'Unknown error'}
-                    failed += 1
-                
-                pbar.update(1)
+                pending_indices.append(job_index)
+            pbar.update(skipped)
+            
+            # Submit jobs to API in chunks, several at a time
+            semaphore = asyncio.Semaphore(SUBMIT_CONCURRENCY)
+            
+            async def submit_chunk(chunk: tuple[int, ...]) -> tuple[tuple[int, ...], list]:
+                async with semaphore:
+                    return chunk, await submit_jobs_to_queue(client, [jobs[job_index]['share'] for job_index in chunk])
+            
+            with open(get_progress_file(json_file), 'ab', buffering=PROGRESS_BUFFER_SIZE) as progress_log:
+                for task in asyncio.as_completed([submit_chunk(chunk) for chunk in batched(pending_indices, SUBMIT_CHUNK_SIZE)]):
+                    chunk, results = await task
+                    for job_index, (job_id, response_data) in zip(chunk, results):
+                        if job_id:
+                            jobs[job_index]['status'] = 'processing'
+                            jobs[job_index]['data'] = response_data
+                            submitted += 1
+                        else:
+                            jobs[job_index]['status'] = 'error'
+                            jobs[job_index]['data'] = response_data or {'error': 'Unknown error'}
+                            failed += 1
+                        append_job_update(progress_log, job_index, jobs[job_index])
+                    pbar.update(len(chunk))
         
         # Save progress
-        save_jobs_to_file(jobs, json_file)
+        finalize_progress(jobs, json_file)
         
         # Print summary
-        print(f'\n{'='*50}')
-        print(f'Summary: {submitted} submitted, {failed} failed, {skipped} skipped')
-        print(f'{'='*50}')
+        print(f'\n{SEP}\nSummary: {submitted} submitted, {failed} failed, {skipped} skipped\n{SEP}')
         return
     
     # wait=True: Use queue management and polling
@@ -477,42 +683,72 @@ def batch_download_from_file(
     print('Press Ctrl+C at any time to stop and save progress.')
     
     # Initialize queue and tracking variables
-    active_queue: list[tuple[int, int, str]] = []
+    active_queue: dict[int, tuple[list[int], str]] = {}
+    poll_counts: dict[int, int] = {}
+    next_poll_at: dict[int, float] = {}
     job_index = 0
-    last_poll_time = time.time()
     interrupted = False
+    last_snapshot_time = time.monotonic()
+    
+    def schedule_poll(job_id: int) -> None:
+        # Poll new jobs quickly so fast downloads are noticed early, then back off to the poll interval
+        count = poll_counts.get(job_id, 0)
+        delay = POLL_DELAYS[count] if count < len(POLL_DELAYS) else poll_interval
+        next_poll_at[job_id] = time.monotonic() + min(delay, poll_interval)
+        poll_counts[job_id] = count + 1
+    
+    def enqueue(job_id: int, idx: int) -> None:
+        # Identical shares are deduplicated by the server into one job, so track every index waiting on it
+        if job_id in active_queue:
+            active_queue[job_id][0].append(idx)
+        else:
+            active_queue[job_id] = ([idx], jobs[idx]['share'])
+            schedule_poll(job_id)
     
     try:
-        with tqdm(total=len(jobs), desc='Processing jobs', unit='job') as pbar:
+        with (
+            tqdm(total=len(jobs), desc='Processing jobs', unit='job', mininterval=0.5) as pbar,
+            open(get_progress_file(json_file), 'ab', buffering=PROGRESS_BUFFER_SIZE) as progress_log,
+        ):
             while job_index < len(jobs) or active_queue:
-                current_time = time.time()
+                current_time = time.monotonic()
+                # Jobs finished in this pass, added to the progress bar in one update
+                finished = 0
                 
-                # Poll job statuses if enough time has passed
-                if current_time - last_poll_time >= poll_interval:
-                    jobs_to_remove = poll_all_jobs(active_queue, jobs)
-                    
-                    # Remove completed jobs from queue
-                    for queue_item in jobs_to_remove:
-                        active_queue.remove(queue_item)
-                        pbar.update(1)
-                    
-                    last_poll_time = current_time
+                # Periodically fold the progress log into the jobs file so it does not grow without bound
+                if current_time - last_snapshot_time >= SNAPSHOT_INTERVAL:
+                    checkpoint_progress(jobs, json_file, progress_log)
+                    last_snapshot_time = current_time
+                
+                # Poll the jobs that are due
+                due_jobs = {job_id: item for job_id, item in active_queue.items() if next_poll_at[job_id] <= current_time}
+                if due_jobs:
+                    done_ids = set(await poll_all_jobs(client, due_jobs, jobs, progress_log))
+                    for job_id in due_jobs:
+                        if job_id in done_ids:
+                            # Remove completed jobs from queue
+                            job_indices, _ = active_queue.pop(job_id)
+                            del poll_counts[job_id], next_poll_at[job_id]
+                            finished += len(job_indices)
+                        else:
+                            schedule_poll(job_id)
                 
-                # Add jobs to queue if there's space
-                while job_index < len(jobs) and len(active_queue) < queue_size:
+                # Add jobs to queue if there's space, submitting them together
+                to_submit = []
+                while job_index < len(jobs) and len(active_queue) + len(to_submit) < queue_size:
                     job = jobs[job_index]
                     
                     # Skip empty shares
                     if not job.get('share'):
                         job_index += 1
-                        pbar.update(1)
+                        finished += 1
                         continue
                     
                     # Skip if already completed or canceled
                     job_status = job.get('status', 'pending')
                     if job_status in ('completed', 'canceled'):
                         job_index += 1
-                        pbar.update(1)
+                        finished += 1
                         continue
                     
                     # Handle failed/error jobs based on retry flag
@@ -523,56 +759,77 @@ def batch_download_from_file(
                             jobs[job_index]['status'] = 'pending'
                         else:
                             job_index += 1
-                            pbar.update(1)
+                            finished += 1
                             continue
                     
                     # If job has a job_id but status is still pending/processing, 
                     # add it back to the queue to monitor it
-                    if job.get('data') and job['data'].get('job_id'):
-                        job_id = job['data']['job_id']
+                    if job.get('data') and job['data'].get('id'):
+                        job_id = job['data']['id']
                         if job_status in ('pending', 'processing'):
                             # Re-add to queue for monitoring
-                            active_queue.append((job_index, job_id, job['share']))
+                            enqueue(job_id, job_index)
                             if job_status == 'pending':
                                 jobs[job_index]['status'] = 'processing'
                             job_index += 1
                             continue
                     
-                    # Submit job to queue
-                    job_id, response_data = submit_job_to_queue(job, job_index)
-                    
-                    if job_id:
-                        # Successfully queued
-                        active_queue.append((job_index, job_id, job['share']))
-                        jobs[job_index]['status'] = 'processing'
-                        jobs[job_index]['data'] = response_data
-                        job_index += 1
-                    else:
-                        # Failed to submit
-                        jobs[job_index]['status'] = 'error'
-                        jobs[job_index]['data'] = response_data or {'error': 'Unknown error'}
-                        pbar.update(1)
-                        job_index += 1
+                    to_submit.append(job_index)
+                    job_index += 1
+                
+                if to_submit:
+                    results = await submit_jobs_to_queue(client, [jobs[idx]['share'] for idx in to_submit])
+                    for idx, (job_id, response_data) in zip(to_submit, results):
+                        if job_id:
+                            # Successfully queued
+                            enqueue(job_id, idx)
+                            jobs[idx]['status'] = 'processing'
+                            jobs[idx]['data'] = response_data
+                        else:
+                            # Failed to submit
+                            jobs[idx]['status'] = 'error'
+                            jobs[idx]['data'] = response_data or {'error': 'Unknown error'}
+                            finished += 1
+                        append_job_update(progress_log, idx, jobs[idx])
+                
+                pbar.update(finished)
                 
-                # Small sleep to avoid busy waiting
-                if job_index < len(jobs) or active_queue:
-                    time.sleep(0.1)
+                # Slots only free up when a poll finds a job done, so sleep until the next poll is due
+                # rather than waking up on a fixed tick. Keep going right away if there is still room to submit.
+                if active_queue and (len(active_queue) >= queue_size or job_index >= len(jobs)):
+                    await asyncio.sleep(max(0.0, min(next_poll_at.values()) - time.monotonic()))
     
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        # asyncio.run turns Ctrl+C into a cancellation of this coroutine
         interrupted = True
         print('\n\n⚠ Interrupted by user (Ctrl+C)', file=sys.stderr)
     
     # Save progress on exit (normal or interrupted)
-    save_jobs_to_file(jobs, json_file)
+    finalize_progress(jobs, json_file)
     
     # Print summary
     stats = calculate_job_statistics(jobs, active_queue)
-    print(f'\n{'='*50}')
-    if interrupted:
-        print(f'⚠ Process interrupted by user')
-    print(f'Summary: {stats["completed"]} completed, {stats["failed"]} failed, '
-          f'{stats["processing"]} processing, {stats["pending"]} pending, {stats["in_queue"]} still in queue')
-    print(f'{'='*50}')
+    interrupted_line = '⚠ Process interrupted by user\n' if interrupted else ''
+    print(
+        f'\n{SEP}\n{interrupted_line}'
+        f'Summary: {stats["completed"]} completed, {stats["failed"]} failed, '
+        f'{stats["processing"]} processing, {stats["pending"]} pending, {stats["in_queue"]} still in queue\n'
+        f'{SEP}'
+    )
+
+
+async def run_command(args: argparse.Namespace) -> bool:
+    '''
+    Run the command selected by the CLI arguments with a shared HTTP client.
+    
+    Returns:
+        True if successful, False otherwise
+    '''
+    async with create_client(args.base_url) as client:
+        if args.share:
+            return await download_share(client, args.share)
+        await batch_download_from_file(client, args.file, wait=not args.no_wait, retry=args.retry)
+        return True
 
 
 def main():
@@ -637,11 +894,12 @@ Examples:
         sys.exit(1)
     
     # Execute the appropriate function
-    if args.share:
-        success = download_share(args.share)
-        sys.exit(0 if success else 1)
-    else:
-        batch_download_from_file(args.file, wait=not args.no_wait, retry=args.retry)
+    try:
+        success = asyncio.run(run_command(args))
+    except KeyboardInterrupt:
+        # Interrupted outside the batch loop, which saves its progress and returns on Ctrl+C
+        sys.exit(130)
+    sys.exit(0 if success else 1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,84 @@
+import os
+import re
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.utils import download
+
+
+DATA = os.urandom(3 * 1024 * 1024)
+CUTOFF = 2_500_000  # Full-body GETs are cut off after this many bytes
+
+
+class _TruncatingHandler(BaseHTTPRequestHandler):
+    '''Serves DATA, honouring Range, but drops the connection partway through any full-body response.'''
+    protocol_version = 'HTTP/1.1'
+    ranges: list[str | None] = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        range_header = self.headers.get('Range')
+        self.ranges.append(range_header)
+        if range_header:
+            match = re.match(r'bytes=(\d+)-(\d*)', range_header)
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(DATA) - 1
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(DATA)}')
+            body = DATA[start:end + 1]
+        else:
+            self.send_response(200)
+            body = DATA
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if range_header:
+            self.wfile.write(body)
+            return
+        self.wfile.write(body[:CUTOFF])
+        self.wfile.flush()
+        self.close_connection = True
+        self.connection.shutdown(socket.SHUT_RDWR)
+
+
+@pytest.fixture
+def truncating_server():
+    _TruncatingHandler.ranges = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _TruncatingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/file.bin'
+    server.shutdown()
+    server.server_close()
+
+
+def test_batch_chunks_yields_pending_batch_before_error():
+    def chunks():
+        yield b'a'
+        yield b'b'
+        raise ConnectionError('cut off')
+
+    batches = download._batch_chunks(chunks())
+    assert next(batches) == [b'a', b'b']
+    with pytest.raises(ConnectionError):
+        next(batches)
+
+
+def test_download_resumes_after_truncated_body(truncating_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(download.time, 'sleep', lambda seconds: None)
+
+    chunk_size = 64 * 1024
+    path = download.download_file(truncating_server, download_dir=tmp_path, filename='file', chunk_size=chunk_size)
+
+    assert path.read_bytes() == DATA
+    # Probe, the truncated full GET, then a resume from the last whole chunk received before the cut
+    probe, full, resume = _TruncatingHandler.ranges
+    assert (probe, full) == ('bytes=0-0', None)
+    resumed_from = int(resume.removeprefix('bytes=').rstrip('-'))
+    assert CUTOFF - chunk_size < resumed_from <= CUTOFF
@@ -7,17 +7,25 @@ Run this script to process background download jobs.
 
 Usage:
     python worker.py
+    # Run several workers in parallel, each processing one job at a time:
+    python worker.py --num-workers 4
     # or
     rq worker downloads
-    # For macOS, due to Objective-C runtime issues, we need to use SimpleWorker instead:
+    # For macOS, due to Objective-C runtime issues, we need to use SimpleWorker instead
+    # (this script does so automatically, but --num-workers > 1 still forks and needs the variable below):
     rq worker downloads --worker-class rq.worker.SimpleWorker --logging_level DEBUG
     # or set the following environment variable:
     OBJC_DISABLE_INITIALIZE_FORK_SAFETY=YES
 '''
 
+import argparse
+import os
 import sys
+from functools import partial
 
-from rq import Worker
+from rq import SimpleWorker, Worker
+from rq.defaults import DEFAULT_JOB_MONITORING_INTERVAL, DEFAULT_WORKER_TTL
+from rq.worker_pool import WorkerPool
 
 from app.db import SessionLocal
 from app.handlers import initialize_platforms
@@ -25,15 +33,61 @@ from app.utils.queue import get_redis_connection, get_queue
 
 
 def main():
-    '''Start the RQ worker.'''
+    '''Start the RQ worker, or a pool of workers when more than one is requested.'''
+    parser = argparse.ArgumentParser(description='Start RQ workers for download jobs')
+    parser.add_argument(
+        '-n', '--num-workers',
+        type=int,
+        default=1,
+        help='Number of worker processes to run in parallel (default: 1)'
+    )
+    parser.add_argument(
+        '--worker-ttl',
+        type=int,
+        default=DEFAULT_WORKER_TTL,
+        help=f'Seconds without a heartbeat before a worker is considered dead (default: {DEFAULT_WORKER_TTL})'
+    )
+    parser.add_argument(
+        '--job-monitoring-interval',
+        type=int,
+        default=DEFAULT_JOB_MONITORING_INTERVAL,
+        help=f'Seconds between heartbeats while a job runs (default: {DEFAULT_JOB_MONITORING_INTERVAL})'
+    )
+    args = parser.parse_args()
+    
+    # Forking after the Objective-C runtime is initialized crashes on macOS. SimpleWorker avoids the fork per job,
+    # but WorkerPool still forks to start each worker, so a pool is only allowed with the fork safety check disabled.
+    if sys.platform == 'darwin' and args.num_workers > 1 and os.environ.get('OBJC_DISABLE_INITIALIZE_FORK_SAFETY') != 'YES':
+        print(
+            'Error: --num-workers > 1 forks worker processes, which is unsafe on macOS. '
+            'Set OBJC_DISABLE_INITIALIZE_FORK_SAFETY=YES or run a single worker.',
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    worker_class = SimpleWorker if sys.platform == 'darwin' else Worker
+    worker_class = partial(
+        worker_class,
+        worker_ttl=args.worker_ttl,
+        job_monitoring_interval=args.job_monitoring_interval,
+    )
+    
     redis_conn = get_redis_connection()
     queue = get_queue()
-    worker = Worker([queue], connection=redis_conn)
+    if args.num_workers > 1:
+        # The pool forwards Ctrl+C to its workers and waits for them to finish their current jobs
+        # Each pool worker opens its own connection pool, built from the settings of this connection
+        print(f'Starting {args.num_workers} workers for queue: {queue.name}')
+        pool = WorkerPool([queue], connection=redis_conn, num_workers=args.num_workers, worker_class=worker_class)
+        pool.start()
+        return
+    # A single worker shares the connection pool from app.utils.queue
+    worker = worker_class([queue], connection=redis_conn)
 
     print(f'Starting worker for queue: {queue.name}')
     print('Press Ctrl+C to stop the worker')
     try:
-        worker.work()
+        # The scheduler moves jobs waiting between retries back onto the queue
+        worker.work(with_scheduler=True)
     except KeyboardInterrupt:
         print('\nWorker stopped by user')
         sys.exit(0)